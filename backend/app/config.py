@@ -8,6 +8,77 @@ class Settings(BaseSettings):
     DATABASE_NAME: str
     JWT_SECRET: str
     GEMINI_API_KEY: str
+    LOG_LEVEL: str = "INFO"
+
+    # Yahoo Finance upstream limits
+    YAHOO_RATE_PER_SEC: float = 5.0
+    YAHOO_BURST: int = 10
+    YAHOO_MAX_CONCURRENCY: int = 4
+    YAHOO_RETRIES: int = 2
+
+    # Shared market snapshot (seconds)
+    SNAPSHOT_TTL: float = 60.0
+    SNAPSHOT_REFRESH_SECONDS: float = 30.0
+
+    # Live prices over /ws/prices: one poller per watched ticker
+    PRICE_STREAM_INTERVAL: float = 15.0
+    PRICE_STREAM_MAX_TICKERS: int = 50  # per connection
+    PRICE_STREAM_SEND_TIMEOUT: float = 10.0  # close clients that can't take a frame this fast
+
+    # Company catalogue reload interval when change streams are unavailable (seconds)
+    CATALOG_TTL: float = 300.0
+
+    # Cross-worker cache: "sqlite" (one file per host), "redis", "memory" (per process) or "none"
+    CACHE_BACKEND: str = "sqlite"
+    CACHE_PATH: str = str(BASE_DIR / ".cache" / "shared-cache.sqlite3")
+    CACHE_URL: str = "redis://localhost:6379/0"
+    CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    QUOTE_CACHE_TTL: float = 60.0
+    HISTORY_CACHE_TTL: float = 900.0
+    FORECAST_CACHE_TTL: float = 3600.0
+    FORECAST_MAX_HORIZON: int = 365  # days; every shorter horizon is sliced from this forecast
+    SENTIMENT_CACHE_TTL: float = 1800.0
+
+    # Score one tweet per near-duplicate cluster (estimated 5-gram similarity at least this)
+    TWEET_DEDUP: bool = True
+    TWEET_DEDUP_THRESHOLD: float = 0.7
+
+    # Approximate tweet sentiment: score random batches until the company score's confidence
+    # interval is within ±SENTIMENT_EPSILON or the time budget (seconds) runs out.
+    # Opt-in; /analyze?approximate=true|false overrides it per request.
+    SENTIMENT_SAMPLING: bool = False
+    SENTIMENT_EPSILON: float = 0.02
+    SENTIMENT_CONFIDENCE: float = 0.95
+    SENTIMENT_TIME_BUDGET: float = 5.0  # whole sampling run; checked between batches, so up to one batch over
+    SENTIMENT_SAMPLE_BATCH: int = 32
+
+    # Sentiment models: memory-map exported weights so every worker shares one copy
+    FINBERT_MODEL: str = "yiyanghkust/finbert-tone"  # hub id or local directory
+    MODEL_MMAP: bool = True
+    MODEL_CACHE_DIR: str = str(BASE_DIR / ".cache" / "models")
+
+    # Recommendation rule in analyze_company (evaluate changes with app.scripts.backtest)
+    RECOMMEND_STOCK_WEIGHT: float = 0.4  # tweets get the rest
+    RECOMMEND_BUY_THRESHOLD: float = 0.7
+    RECOMMEND_SELL_THRESHOLD: float = 0.3
+    RISK_MEDIUM_PCT: float = 5.0  # |forecast % change| above this is at least Medium
+    RISK_HIGH_PCT: float = 10.0
+    RISK_LOW_SCORE: float = 0.4  # final scores outside [low, high] are High risk
+    RISK_HIGH_SCORE: float = 0.9
+
+    # Portfolio revaluation job (seconds); request-time reads reuse valuations younger than REVALUE_MAX_AGE
+    REVALUE_INTERVAL: float = 900.0
+    REVALUE_MAX_AGE: float = 1800.0
+    REVALUE_BATCH_SIZE: int = 1000
+
+    # Auth
+    BCRYPT_WORKERS: int = 4
+    TOKEN_CACHE_TTL: float = 30.0
+
+    # Chat
+    CHAT_SESSION_TTL: float = 1800.0
+    CHAT_HISTORY_TOKENS: int = 1500  # summarize older turns past this
+    CHAT_KEEP_TURNS: int = 4  # messages always kept verbatim
 
     model_config = SettingsConfigDict(
         env_file=BASE_DIR / ".env",  # absolute path to .env
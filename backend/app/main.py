@@ -1,8 +1,42 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import auth, companies, user, stocks, analyseMarket
+from app.config import settings
+from app.routes import auth, companies, user, stocks, analyseMarket, metrics, market, chat
+from app.services.companyCatalog import catalog
+from app.services.marketSnapshot import market_snapshot
+from app.services.portfolioRevaluation import revalue_forever
+from app.services.priceStream import price_hub
 
-app = FastAPI()
+logging.basicConfig(
+    level=settings.LOG_LEVEL.upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await catalog.load()
+    except Exception:
+        logging.getLogger(__name__).exception("Initial company catalogue load failed; will retry on demand")
+
+    # Background jobs that keep shared caches warm
+    tasks = [
+        asyncio.create_task(catalog.watch_forever()),
+        asyncio.create_task(market_snapshot.refresh_forever()),
+        asyncio.create_task(revalue_forever()),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await price_hub.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS setup
 origins = [
@@ -24,6 +58,9 @@ app.include_router(companies.router)
 app.include_router(user.router)
 app.include_router(stocks.router)
 app.include_router(analyseMarket.router)
+app.include_router(metrics.router)
+app.include_router(market.router)
+app.include_router(chat.router)
 
 @app.get("/")
 async def root():
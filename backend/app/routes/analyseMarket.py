@@ -1,7 +1,6 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
 from app.services.analyzeStock import analyze_company
-from app.config import settings
-from motor.motor_asyncio import AsyncIOMotorClient
 from io import BytesIO
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
@@ -10,29 +9,43 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.lib.units import inch
 from datetime import datetime
 import base64
+from app.config import settings
+from app.services.companyCatalog import catalog
+from app.utils.metrics import stage
 
 router = APIRouter()
 
-# MongoDB client
-client = AsyncIOMotorClient(settings.MONGODB_URL)
-db = client[settings.DATABASE_NAME]
+
+def tweet_score_label(result: dict) -> str:
+    confidence = result["tweet_confidence"]
+    if not confidence["approximate"]:
+        return f"{result['tweet_score']:.4f}"
+    if confidence["half_width"] is None:  # too few tweets scored for an interval
+        return f"{result['tweet_score']:.4f} ({confidence['tweets_scored']}/{confidence['tweets_total']} tweets)"
+    return (f"{result['tweet_score']:.4f} ± {confidence['half_width']:.4f} "
+            f"({confidence['level']:.0%}, {confidence['tweets_scored']}/{confidence['tweets_total']} tweets)")
+
 
 @router.get("/analyze/{ticker}")
-async def analyze(ticker: str, future_days: int = 90):
+async def analyze(ticker: str, future_days: int = Query(90, ge=1, le=settings.FORECAST_MAX_HORIZON),
+                  approximate: Optional[bool] = Query(None)):
     """
     Returns stock + tweet analysis for a given company ticker.
     Automatically generates a downloadable PDF report.
+    approximate=true samples tweets until the sentiment's confidence interval
+    is tight enough (defaults to settings.SENTIMENT_SAMPLING).
     """
     ticker = ticker.upper()
 
     # ✅ Check if ticker exists
-    company = await db.companies.find_one({"ticker": ticker})
+    await catalog.ensure_loaded()
+    company = catalog.get(ticker)
     if not company:
         raise HTTPException(status_code=404, detail="Company not supported")
 
     try:
         # ✅ Run AI + Stock analysis
-        result = await analyze_company(ticker, future_days=future_days)
+        result = await analyze_company(ticker, future_days=future_days, approximate=approximate)
 
         # ✅ Generate PDF automatically
         buffer = BytesIO()
@@ -84,10 +97,10 @@ async def analyze(ticker: str, future_days: int = 90):
         data = [
             ["Metric", "Value"],
             ["Last Price (Today)", f"${result['last_price']:.2f}"],
-            ["Predicted Price (90 Days)", f"${result['predicted_price']:.2f}"],
+            [f"Predicted Price ({result['future_days']} Days)", f"${result['predicted_price']:.2f}"],
             ["Percentage Change", f"{result['pct_change']:+.2f}%"],
             ["Stock Score", f"{result['stock_score']:.4f}"],
-            ["Tweet Score", f"{result['tweet_score']:.4f}"],
+            ["Tweet Score", tweet_score_label(result)],
             ["Final Score", f"{result['final_score']}"],
             ["Recommendation", result['recommendation']],
             ["Risk", result['risk']],
@@ -115,7 +128,8 @@ async def analyze(ticker: str, future_days: int = 90):
         ))
 
         # ✅ Build PDF
-        doc.build(elements)
+        with stage("pdf_build", ticker=ticker):
+            doc.build(elements)
         buffer.seek(0)
         pdf_bytes = buffer.getvalue()
         buffer.close()
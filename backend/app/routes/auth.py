@@ -1,22 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.config import settings
 from app.services.yfinance_helper import get_stock_price
-from passlib.context import CryptContext
 from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import date
-from app.services.loginHelper import LoginPayload, verify_password, create_access_token, TokenResponse
+from app.services.loginHelper import LoginPayload, verify_password_async, hash_password_async, create_access_token, TokenResponse
 from app.services.userDetails import get_current_user
+from app.utils.metrics import run_in_thread
 import logging
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # MongoDB client
 client = AsyncIOMotorClient(settings.MONGODB_URL)
 db = client[settings.DATABASE_NAME]
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 @router.post("/register")
@@ -47,7 +44,7 @@ async def register_user(payload: dict):
             if len(password_bytes) > 72:
                 password = password_bytes[:72].decode('utf-8', errors='ignore')
                 logger.warning("Password truncated to 72 bytes")
-            hashed_password = pwd_context.hash(password)
+            hashed_password = await hash_password_async(password)
 
         # Process portfolio
         processed_portfolio = []
@@ -64,7 +61,7 @@ async def register_user(payload: dict):
                 purchase_date = date.today().isoformat()
 
             try:
-                price = get_stock_price(ticker)  # Make sure this returns float
+                price = await run_in_thread("yahoo", get_stock_price, ticker)  # None if Yahoo is unavailable
                 if price is None:
                     logger.error(f"Failed to fetch price for ticker {ticker}")
                     continue
@@ -105,7 +102,7 @@ async def login(payload: LoginPayload):
         if payload.password is not None and payload.password != "":
             raise HTTPException(status_code=401, detail="Invalid email or password")
     # Handle regular users (password required)
-    elif payload.password is None or not verify_password(payload.password, user["password"]):
+    elif payload.password is None or not await verify_password_async(payload.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     # Create JWT token
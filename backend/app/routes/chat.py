@@ -0,0 +1,58 @@
+# app/routes/chat.py
+import json
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from app.services.chatSession import chat_store
+from app.services.userDetails import get_user_identity
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class ChatRequest(BaseModel):
+    message: str = Field(min_length=1, max_length=4000)
+    conversationId: Optional[str] = None
+
+
+def sse(data: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@router.post("/chat")
+async def chat(payload: ChatRequest, user=Depends(get_user_identity)):
+    """
+    Portfolio-aware chat streamed as server-sent events:
+    `meta` (conversationId), one unnamed event per text chunk ({"delta": ...}),
+    then `done` or `error`. Send the conversationId back to continue the thread;
+    the history lives server-side.
+    """
+    user_id = str(user["_id"])
+    conversation_id = await chat_store.open(user_id, payload.conversationId)
+
+    async def events():
+        yield sse({"conversationId": conversation_id}, event="meta")
+        async with chat_store.session(user_id, conversation_id) as conversation:
+            try:
+                async for delta in chat_store.reply(conversation, user, payload.message):
+                    yield sse({"delta": delta})
+            except Exception as e:
+                logger.error("Chat reply failed: %s", e)
+                yield sse({"detail": "The assistant is unavailable right now"}, event="error")
+                return
+            # Saved before `done`, so a follow-up on another worker sees this turn
+            await chat_store.save(user_id, conversation_id, conversation)
+            yield sse({}, event="done")
+            # After `done`, so the client never waits on summarization (saved when the session closes)
+            await chat_store.compact(conversation)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,21 +1,19 @@
 # app/routes/companies.py
-from fastapi import APIRouter
-from app.config import settings
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import JSONResponse
+from app.services.companyCatalog import catalog
 
 router = APIRouter()
 
-# MongoDB client
-client = AsyncIOMotorClient(settings.MONGODB_URL)
-db = client[settings.DATABASE_NAME]
-
 @router.get("/companies")
-async def get_companies():
+async def get_companies(request: Request):
     """
     Return all companies as an array of {ticker, name}.
+    Served from the in-memory catalogue; honours If-None-Match with a 304.
     """
-    companies_cursor = db.companies.find()
-    companies = []
-    async for c in companies_cursor:
-        companies.append({"ticker": c["ticker"], "name": c["name"]})
-    return companies
+    await catalog.ensure_loaded()
+    headers = {"ETag": catalog.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if catalog.etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(catalog.companies, headers=headers)
@@ -0,0 +1,139 @@
+# app/routes/market.py
+import asyncio
+import json
+import logging
+import time
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from jose import JWTError
+from app.config import settings
+from app.services.companyCatalog import catalog
+from app.services.marketSnapshot import market_snapshot
+from app.services.priceStream import Subscriber, price_hub
+from app.services.userDetails import resolve_token, verify_token
+from app.services.yahoo_client import UpstreamUnavailable
+from app.utils.metrics import PRICE_STREAM_CLIENTS
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# App-defined close code (4000-4999): token invalid or expired, so reconnecting with it is pointless
+AUTH_CLOSE_CODE = 4401
+
+
+@router.get("/market/snapshot")
+async def snapshot(tickers: Optional[str] = Query(None, description="Comma-separated tickers; all companies if omitted")):
+    """
+    Latest price, previous close and daily change for every company (or the
+    given tickers), served from a shared cache refreshed in the background.
+    """
+    wanted = None
+    if tickers:
+        wanted = {t.strip().upper() for t in tickers.split(",") if t.strip()}
+        await catalog.ensure_loaded()
+        unknown = sorted(t for t in wanted if catalog.get(t) is None)
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Unknown tickers: {', '.join(unknown)}")
+    try:
+        result = await market_snapshot.get(wanted)
+    except UpstreamUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {
+        "asOf": result["asOf"],
+        "stale": result["stale"],
+        "quotes": list(result["quotes"].values()),
+    }
+
+
+async def _send_quotes(websocket: WebSocket, subscriber: Subscriber):
+    while True:
+        quotes = await subscriber.next_batch()
+        try:
+            await asyncio.wait_for(
+                websocket.send_json({"type": "quotes", "quotes": quotes}),
+                timeout=settings.PRICE_STREAM_SEND_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            logger.info("Closing slow price stream client")
+            await websocket.close(code=1013)  # try again later
+            return
+
+
+async def _receive_commands(websocket: WebSocket, subscriber: Subscriber):
+    while True:
+        try:
+            message = json.loads(await websocket.receive_text())
+            action = message["action"]
+            tickers = {str(t).strip().upper() for t in message.get("tickers", [])}
+        except (ValueError, KeyError, TypeError, AttributeError):
+            await websocket.send_json({"type": "error", "detail": "Expected {\"action\": ..., \"tickers\": [...]}"})
+            continue
+
+        if action == "unsubscribe":
+            price_hub.unsubscribe(subscriber, tickers)
+        elif action == "subscribe":
+            await catalog.ensure_loaded()
+            unknown = sorted(t for t in tickers if catalog.get(t) is None)
+            if unknown:
+                await websocket.send_json({"type": "error", "detail": f"Unknown tickers: {', '.join(unknown)}"})
+            tickers -= set(unknown)
+            if len(subscriber.tickers | tickers) > settings.PRICE_STREAM_MAX_TICKERS:
+                await websocket.send_json({
+                    "type": "error",
+                    "detail": f"At most {settings.PRICE_STREAM_MAX_TICKERS} tickers per connection",
+                })
+                continue
+            price_hub.subscribe(subscriber, tickers)
+        else:
+            await websocket.send_json({"type": "error", "detail": f"Unknown action: {action}"})
+
+
+async def _expire_session(websocket: WebSocket, expires_at: float):
+    """Close the socket once the bearer token it was opened with expires."""
+    await asyncio.sleep(max(0.0, expires_at - time.time()))
+    await websocket.close(code=AUTH_CLOSE_CODE, reason="token expired")
+
+
+@router.websocket("/ws/prices")
+async def price_stream(websocket: WebSocket, token: str = Query(...)):
+    """
+    Live quotes for the tickers a client subscribes to. Send
+    {"action": "subscribe" | "unsubscribe", "tickers": [...]}; receive
+    {"type": "quotes", "quotes": [...]} whenever a watched price changes
+    (the latest known quote is sent right after subscribing). A client that
+    falls behind only gets the newest quote per ticker. The socket is closed
+    with AUTH_CLOSE_CODE if the token is rejected, and again when it expires.
+    """
+    # Accept first: a handshake rejected before accept reaches browsers as a bare 1006,
+    # and the client needs AUTH_CLOSE_CODE to know not to retry
+    await websocket.accept()
+    # Browsers can't set headers on a WebSocket, so the bearer token comes in the query
+    try:
+        await resolve_token(token)
+        expires_at = verify_token(token)["exp"]
+    except (JWTError, HTTPException):
+        await websocket.close(code=AUTH_CLOSE_CODE, reason="invalid token")
+        return
+
+    subscriber = Subscriber()
+    PRICE_STREAM_CLIENTS.inc()
+    tasks = [
+        asyncio.create_task(_send_quotes(websocket, subscriber)),
+        asyncio.create_task(_receive_commands(websocket, subscriber)),
+    ]
+    if expires_at:
+        tasks.append(asyncio.create_task(_expire_session(websocket, expires_at)))
+    try:
+        # Any task ending (disconnect, slow client closed, token expired) ends the session
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                logger.error("Price stream failed: %s", error)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        price_hub.unsubscribe(subscriber)
+        PRICE_STREAM_CLIENTS.dec()
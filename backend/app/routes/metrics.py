@@ -0,0 +1,15 @@
+# app/routes/metrics.py
+from fastapi import APIRouter, Response
+from app.utils.metrics import render_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def metrics():
+    """
+    Prometheus scrape endpoint: stage timings, cache hit/miss counts,
+    executor queue depth and upstream error counts.
+    """
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Query
-from app.services.yfinance_helper import get_stock_price, get_stock_history
+from app.services.yfinance_helper import get_stock_quote, get_stock_history
+from app.utils.metrics import run_in_thread
 
 router = APIRouter()
 
@@ -8,10 +9,12 @@ async def stock_history(ticker: str, range: str = Query("1d")):
     """
     range options: 5d, 1m, 3m, 6m, 1y, max
     """
-    history = get_stock_history(ticker, range)
+    history = await run_in_thread("yahoo", get_stock_history, ticker, range)
     if not history:
         raise HTTPException(status_code=404, detail="Stock data not found")
-    current_price = get_stock_price(ticker)
+    quote = await run_in_thread("yahoo", get_stock_quote, ticker)
+    current_price = quote["price"] if quote else history[-1]["close"]
+    stale = quote["stale"] if quote else True
 
     # Calculate daily change
     if len(history) > 1:
@@ -19,4 +22,4 @@ async def stock_history(ticker: str, range: str = Query("1d")):
     else:
         dailyChange = 0
 
-    return {"ticker": ticker, "prices": history, "currentPrice": current_price, "dailyChange": dailyChange}
+    return {"ticker": ticker, "prices": history, "currentPrice": current_price, "dailyChange": dailyChange, "stale": stale}
@@ -2,9 +2,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
+from datetime import datetime, timezone
 from app.config import settings
-from app.services.userDetails import get_current_user
-from app.services.yfinance_helper import get_stock_price_on_date, get_stock_price
+from app.services.companyCatalog import catalog
+from app.services.userDetails import get_current_user, user_cache, value_holding
+from app.utils.metrics import run_in_thread
 
 router = APIRouter()
 client = AsyncIOMotorClient(settings.MONGODB_URL)
@@ -21,6 +23,7 @@ async def update_user(payload: dict, current_user=Depends(get_current_user)):
 
     total_profit = 0.0
     updated_portfolio = []
+    await catalog.ensure_loaded()
 
     # Process portfolio items
     for item in portfolio:
@@ -32,32 +35,27 @@ async def update_user(payload: dict, current_user=Depends(get_current_user)):
             continue
 
         # Fetch prices
-        purchase_price = get_stock_price_on_date(ticker, purchase_date)
-        current_price = get_stock_price(ticker)
-
-        profit_per_share = current_price - purchase_price
-        total_item_profit = profit_per_share * quantity
-        total_profit += total_item_profit
+        valuation = await run_in_thread("yahoo", value_holding, ticker, quantity, purchase_date)
+        if valuation["totalProfit"] is not None:
+            total_profit += valuation["totalProfit"]
 
         # Get company name
-        company = await db.companies.find_one({"ticker": ticker})
-        company_name = company["name"] if company else ticker
+        company_name = catalog.name(ticker)
 
         updated_portfolio.append({
             "companyId": ticker,
             "quantity": quantity,
             "purchaseDate": purchase_date,
-            "purchasePrice": purchase_price,
-            "currentPrice": current_price,
-            "profitPerShare": profit_per_share,
-            "totalProfit": total_item_profit,
+            **valuation,
             "companyName": company_name
         })
 
     # Update MongoDB
     await db.users.update_one(
         {"_id": user_id},
-        {"$set": {"username": username, "portfolio": updated_portfolio, "profit": total_profit}}
+        {"$set": {"username": username, "portfolio": updated_portfolio, "profit": total_profit,
+                  "valuedAt": datetime.now(timezone.utc)}}
     )
+    await user_cache.ainvalidate(str(user_id))
 
     return {"message": "User updated successfully", "username": username, "portfolio": updated_portfolio, "profit": total_profit}
@@ -0,0 +1,66 @@
+"""
+Backtest the Buy / Hold / Sell and risk rule of analyze_company over history.
+
+Usage (from backend/):
+    python -m app.scripts.backtest [--tickers AAPL,MSFT] [--years 5] [--hold 63] [--csv grid.csv]
+Downloads daily closes for every company in one request, replays the stored
+sentiment snapshots and scores every weight / threshold combination.
+"""
+import argparse
+import asyncio
+import pandas as pd
+from app.config import settings
+from app.services.backtest import run_backtest
+
+RULE_COLUMNS = ["stock_weight", "buy_threshold", "sell_threshold", "coverage",
+                "buy_hit_rate", "sell_hit_rate", "hit_rate", "mean_return"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", help="comma-separated; every company if omitted")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--lookback", type=int, default=60, help="trend window, sessions")
+    parser.add_argument("--hold", type=int, default=63, help="holding period, sessions")
+    parser.add_argument("--min-coverage", type=float, default=0.05,
+                        help="ignore rules that signal on fewer than this fraction of days")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--csv", help="write the full grid here")
+    args = parser.parse_args()
+    if args.hold < 1 or args.lookback < 2:
+        parser.error("--hold must be at least 1 and --lookback at least 2")
+
+    tickers = [t.strip().upper() for t in args.tickers.split(",")] if args.tickers else None
+    result = asyncio.run(run_backtest(tickers, years=args.years, lookback=args.lookback, hold=args.hold))
+
+    print(f"📊 {result['tickers']} tickers x {result['sessions']} sessions = {result['observations']} "
+          f"observations, hold {args.hold} sessions")
+    print(f"   sentiment snapshots cover {result['sentiment_coverage']:.1%} of ticker-days; "
+          f"grid of {len(result['grid'])} rules scored in {result['grid_seconds']:.2f}s")
+    print(f"   baseline: {result['baseline_up_rate']:.1%} of holds went up, "
+          f"mean return {result['baseline_mean_return']:+.2f}%")
+
+    with pd.option_context("display.width", 160, "display.float_format", "{:.4f}".format):
+        print(f"\n🎯 Current rule (weight {settings.RECOMMEND_STOCK_WEIGHT}, "
+              f"buy > {settings.RECOMMEND_BUY_THRESHOLD}, sell < {settings.RECOMMEND_SELL_THRESHOLD})")
+        print(pd.Series(result["current"])[RULE_COLUMNS[3:]].to_string())
+
+        grid = result["grid"]
+        ranked = grid[grid["coverage"] >= args.min_coverage].sort_values("mean_return", ascending=False)
+        print(f"\n🏆 Top {args.top} rules by mean return (coverage >= {args.min_coverage:.0%})")
+        print(ranked[RULE_COLUMNS].head(args.top).to_string(index=False))
+
+        risk = result["risk"].sort_values(["ordered", "high_abs_return"], ascending=False)
+        print(f"\n⚠️  Risk bands: realized |return| per band (current cut-offs "
+              f"{settings.RISK_MEDIUM_PCT}% / {settings.RISK_HIGH_PCT}%)")
+        print(pd.Series(result["current_risk"]).to_string())
+        print()
+        print(risk.to_string(index=False))
+
+    if args.csv:
+        result["grid"].to_csv(args.csv, index=False)
+        print(f"\n💾 Full grid written to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
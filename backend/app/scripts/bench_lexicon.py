@@ -0,0 +1,62 @@
+"""
+Microbenchmark: per-tweet VADER + TextBlob loop vs. batch lexicon_scores().
+
+Usage (from backend/):
+    python -m app.scripts.bench_lexicon [--scale 1000] [--processes N]
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+import numpy as np
+from textblob import TextBlob
+from app.utils.lexiconSentiment import lexicon_scores, vader
+
+DATA_FILE = Path(__file__).resolve().parents[2] / "data.json"
+
+
+def load_tweets(scale: int):
+    with open(DATA_FILE, encoding="utf-8") as f:
+        docs = json.load(f)
+    tweets = [t["tweet_text"] for doc in docs for t in doc["tweets"]]
+    return tweets * scale
+
+
+def per_tweet(tweets):
+    """The previous analyze_tweets() loop, minus FinBERT."""
+    v, t = [], []
+    for tweet in tweets:
+        v.append((vader.polarity_scores(tweet)["compound"] + 1) / 2)
+        t.append((TextBlob(tweet).sentiment.polarity + 1) / 2)
+    return np.array(v), np.array(t)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    tweets = load_tweets(args.scale)
+    print(f"📊 {len(tweets)} tweets (data.json x{args.scale})")
+
+    (v0, t0), loop_s = timed(per_tweet, tweets)
+    (v1, t1), batch_s = timed(lexicon_scores, tweets, processes=1)
+    (v2, t2), shard_s = timed(lexicon_scores, tweets, processes=args.processes)
+
+    assert np.allclose(v0, v1) and np.allclose(t0, t1), "batch scores diverge from per-tweet path"
+    assert np.allclose(v0, v2) and np.allclose(t0, t2), "sharded scores diverge from per-tweet path"
+
+    print(f"per-tweet loop      : {loop_s:8.2f}s  ({len(tweets) / loop_s:,.0f} tweets/s)")
+    print(f"batch (1 process)   : {batch_s:8.2f}s  ({len(tweets) / batch_s:,.0f} tweets/s)  x{loop_s / batch_s:.1f}")
+    print(f"batch (sharded)     : {shard_s:8.2f}s  ({len(tweets) / shard_s:,.0f} tweets/s)  x{loop_s / shard_s:.1f}")
+
+
+if __name__ == "__main__":
+    main()
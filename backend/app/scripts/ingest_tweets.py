@@ -0,0 +1,55 @@
+"""
+Load influencer tweets into db.tweets with their near-duplicate clusters.
+
+Usage (from backend/):
+    python -m app.scripts.ingest_tweets [--file data.json]
+    python -m app.scripts.ingest_tweets --reindex    # re-cluster what's already stored
+Each document is stored whole (one per influencer, replacing the previous
+one); every tweet gets a "cluster" field that predict_tweet uses to score
+each group of near-duplicates once.
+"""
+import argparse
+import asyncio
+import json
+from pathlib import Path
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+from app.utils.tweetDedup import index_tweets
+
+DATA_FILE = Path(__file__).resolve().parents[2] / "data.json"
+
+
+def describe(doc: dict) -> str:
+    tweets = doc.get("tweets", [])
+    clusters = len({t["cluster"] for t in tweets})
+    return f"{doc['influencer']['name']}: {len(tweets)} tweets, {clusters} clusters"
+
+
+async def ingest(path: Path):
+    db = AsyncIOMotorClient(settings.MONGODB_URL)[settings.DATABASE_NAME]
+    with open(path, encoding="utf-8") as f:
+        docs = json.load(f)
+    for doc in docs:
+        index_tweets(doc, settings.TWEET_DEDUP_THRESHOLD)
+        await db.tweets.replace_one({"influencer.name": doc["influencer"]["name"]}, doc, upsert=True)
+        print(f"✅ {describe(doc)}")
+
+
+async def reindex():
+    db = AsyncIOMotorClient(settings.MONGODB_URL)[settings.DATABASE_NAME]
+    async for doc in db.tweets.find({}):
+        index_tweets(doc, settings.TWEET_DEDUP_THRESHOLD)
+        await db.tweets.update_one({"_id": doc["_id"]}, {"$set": {"tweets": doc["tweets"], "dedup": doc["dedup"]}})
+        print(f"🔁 {describe(doc)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file", type=Path, default=DATA_FILE)
+    parser.add_argument("--reindex", action="store_true", help="cluster the tweets already in db.tweets")
+    args = parser.parse_args()
+    asyncio.run(reindex() if args.reindex else ingest(args.file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Revalue every user's portfolio once, outside the API's schedule.
+
+Usage (from backend/):
+    python -m app.scripts.revalue_portfolios [--batch-size 1000]
+"""
+import argparse
+import asyncio
+import logging
+from app.config import settings
+from app.services.portfolioRevaluation import revalue_all
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=settings.REVALUE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=settings.LOG_LEVEL.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    summary = asyncio.run(revalue_all(args.batch_size))
+    print(f"💼 {summary['updated']}/{summary['users']} portfolios revalued over {summary['tickers']} tickers "
+          f"in {summary['seconds']:.2f}s ({summary['users_per_second']:.0f} users/s)")
+    if summary["skipped"]:
+        print(f"   {summary['skipped']} changed while the job ran; the next run picks them up")
+    if summary["stale"]:
+        print("   ⚠️  Yahoo was unavailable; prices are the last known values")
+
+
+if __name__ == "__main__":
+    main()
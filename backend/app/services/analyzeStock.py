@@ -1,12 +1,14 @@
 # app/services/analyseStock.py
 import asyncio
 import json
+from app.config import settings
 from app.utils.llmHelper import llm_model
+from app.utils.metrics import record_upstream_error, stage
 from app.utils.stockPredict import predict_stock
-from app.utils.tweetsPredict import predict_tweet
+from app.utils.tweetsPredict import tweet_sentiment
 
 
-async def analyze_company(ticker: str, future_days: int = 90):
+async def analyze_company(ticker: str, future_days: int = 90, approximate: bool = None):
     """
     Combines stock price prediction (Prophet) and tweet sentiment.
     Returns:
@@ -15,32 +17,37 @@ async def analyze_company(ticker: str, future_days: int = 90):
       - Risk level: Low / Medium / High
       - LLM explanation (concise)
       - Historical + predicted data for charting
+    approximate: sample tweets instead of scoring all of them (None follows
+    settings.SENTIMENT_SAMPLING); tweet_confidence reports how close it is.
     """
 
     ticker = ticker.strip().upper()
 
     # Run stock & tweet prediction concurrently
     stock_task = asyncio.create_task(predict_stock(ticker, future_days=future_days, plot=False))
-    tweet_task = asyncio.create_task(predict_tweet(ticker))
-    stock_result, tweet_score = await asyncio.gather(stock_task, tweet_task)
+    tweet_task = asyncio.create_task(tweet_sentiment(ticker, approximate=approximate))
+    stock_result, sentiment = await asyncio.gather(stock_task, tweet_task)
+    tweet_score = sentiment["score"]
 
     # Compute weighted final score
     stock_score = stock_result["directional_score"]
-    final_score = round(0.4 * stock_score + 0.6 * tweet_score, 4)
+    weight = settings.RECOMMEND_STOCK_WEIGHT
+    final_score = round(weight * stock_score + (1 - weight) * tweet_score, 4)
 
     # Determine simple recommendation
-    if final_score > 0.7:
+    if final_score > settings.RECOMMEND_BUY_THRESHOLD:
         recommendation = "Buy"
-    elif final_score < 0.3:
+    elif final_score < settings.RECOMMEND_SELL_THRESHOLD:
         recommendation = "Sell"
     else:
         recommendation = "Hold"
 
     # Risk level based on volatility and score
     price_change_pct = stock_result["pct_change"]
-    if abs(price_change_pct) > 10 or final_score < 0.4 or final_score > 0.9:
+    if (abs(price_change_pct) > settings.RISK_HIGH_PCT
+            or final_score < settings.RISK_LOW_SCORE or final_score > settings.RISK_HIGH_SCORE):
         risk = "High"
-    elif abs(price_change_pct) > 5:
+    elif abs(price_change_pct) > settings.RISK_MEDIUM_PCT:
         risk = "Medium"
     else:
         risk = "Low"
@@ -82,22 +89,35 @@ Explain this to the user in **simple words** in under 100 words. Highlight:
 - Caution or optimistic signals
 """
     try:
-        explanation = (await llm.ainvoke(prompt)).content
+        with stage("llm_call", ticker=ticker):
+            explanation = (await llm.ainvoke(prompt)).content
     except Exception as e:
+        record_upstream_error("gemini")
         explanation = f"Error generating explanation: {str(e)}"
 
     # Build final result for frontend
     result = {
         "ticker": ticker,
+        "future_days": future_days,
         "last_price": stock_result["last_price"],
         "predicted_price": stock_result["predicted_price"],
         "pct_change": stock_result["pct_change"],
         "stock_score": stock_score,
         "tweet_score": tweet_score,
+        # Interval of the tweet score (half_width 0 unless tweets were sampled)
+        "tweet_confidence": {
+            "approximate": sentiment["approximate"],
+            "half_width": sentiment["half_width"],
+            "level": sentiment["confidence"],
+            "tweets_scored": sentiment["tweets_scored"],
+            "tweets_total": sentiment["tweets_total"],
+        },
         "final_score": final_score,
         "recommendation": recommendation,
         "risk": risk,
         "metrics": stock_result["metrics"],
+        # Forecast at other horizons from the same fit (no refit to switch)
+        "horizons": stock_result["horizons"],
         "explanation": explanation,
         # Data for charting (already JSON-safe)
         "data": chart_data_json,
@@ -0,0 +1,257 @@
+# app/services/backtest.py
+"""
+Replays price history and stored sentiment snapshots through the
+recommendation rule of analyze_company(), for whole grids of weights and
+thresholds at once.
+
+Refitting Prophet for every day of history is far too slow, so the stock
+score here comes from a rolling least-squares trend over the last `lookback`
+sessions, projected `hold` sessions ahead and squashed with the same
+directional_score() as predict_stock. Each (day, ticker) is judged by its
+return over the following `hold` sessions.
+"""
+import logging
+import time
+import numpy as np
+import pandas as pd
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+from app.services.companyCatalog import catalog
+from app.services.yahoo_client import yahoo
+from app.utils.metrics import run_in_thread, stage
+from app.utils.stockPredict import directional_score
+
+logger = logging.getLogger(__name__)
+
+client = AsyncIOMotorClient(settings.MONGODB_URL)
+db = client[settings.DATABASE_NAME]
+
+DEFAULT_WEIGHTS = np.round(np.linspace(0.0, 1.0, 21), 2)
+DEFAULT_BUY_THRESHOLDS = np.round(np.arange(0.50, 0.951, 0.025), 3)
+DEFAULT_SELL_THRESHOLDS = np.round(np.arange(0.05, 0.501, 0.025), 3)
+DEFAULT_RISK_MEDIUM = (2.0, 3.0, 5.0, 7.5)
+DEFAULT_RISK_HIGH = (5.0, 7.5, 10.0, 15.0, 20.0)
+
+
+# ---------------------------
+# Inputs
+# ---------------------------
+async def load_closes(tickers, years: int = 5) -> pd.DataFrame:
+    """Daily closes (sessions x tickers), forward-filled, from one multi-ticker download."""
+    with stage("download", tickers=len(tickers)):
+        result = await run_in_thread("yahoo", yahoo.download, sorted(tickers), period=f"{years}y")
+    closes = result.data["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(name=next(iter(tickers)))
+    return closes.sort_index().ffill().dropna(axis=1, how="all")
+
+
+async def load_sentiment(dates: pd.Index, tickers) -> tuple:
+    """
+    Daily tweet scores aligned to `dates`, from db.sentimentSnapshots (written
+    by predict_tweet). Each snapshot holds until the next one; days before a
+    ticker's first snapshot, and tickers without any, use a neutral 0.5.
+    Never back-filled: a signal may only see sentiment known on its day.
+    Returns (scores, fraction of ticker-days on or after a real snapshot).
+    """
+    with stage("db_fetch", collection="sentimentSnapshots"):
+        rows = [
+            doc async for doc in db.sentimentSnapshots.find(
+                {"ticker": {"$in": list(tickers)}}, {"_id": 0, "ticker": 1, "date": 1, "score": 1}
+            )
+        ]
+    scores = pd.DataFrame(np.nan, index=dates, columns=list(tickers))
+    if rows:
+        snapshots = pd.DataFrame(rows)
+        snapshots["date"] = pd.to_datetime(snapshots["date"])
+        daily = snapshots.pivot_table(index="date", columns="ticker", values="score", aggfunc="last")
+        if dates.tz is not None:
+            daily.index = daily.index.tz_localize(dates.tz)
+        scores = daily.reindex(daily.index.union(dates)).sort_index().ffill().reindex(dates)
+        scores = scores.reindex(columns=list(tickers))
+    covered = float(scores.notna().to_numpy().mean())
+    return scores.fillna(0.5), covered
+
+
+# ---------------------------
+# Vectorized scoring
+# ---------------------------
+def trend_pct_change(closes: np.ndarray, lookback: int, hold: int) -> np.ndarray:
+    """
+    % change from each day's close to a least-squares line over the previous
+    `lookback` closes, extended `hold` rows ahead. NaN where the window is short.
+    """
+    pct = np.full(closes.shape, np.nan)
+    if len(closes) < lookback:
+        return pct
+    windows = np.lib.stride_tricks.sliding_window_view(closes, lookback, axis=0)  # (days, tickers, lookback)
+    x = np.arange(lookback, dtype=float) - (lookback - 1) / 2
+    mean = windows.mean(axis=-1)
+    slope = (windows * x).sum(axis=-1) / (x ** 2).sum()
+    projected = mean + slope * ((lookback - 1) / 2 + hold)
+    last = closes[lookback - 1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct[lookback - 1:] = (projected - last) / last * 100
+    return pct
+
+
+def forward_returns(closes: np.ndarray, hold: int) -> np.ndarray:
+    """% return from each day's close to the close `hold` rows later (NaN at the end)."""
+    fwd = np.full(closes.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fwd[:-hold] = (closes[hold:] - closes[:-hold]) / closes[:-hold] * 100
+    return fwd
+
+
+def evaluate_grid(stock, tweet, fwd, weights, buy_thresholds, sell_thresholds) -> pd.DataFrame:
+    """
+    Hit rate and mean return of every (stock weight, buy, sell threshold)
+    combination, over flat arrays of (day, ticker) observations.
+
+    For each weight the final scores are sorted once; a threshold then maps
+    to a split point, and counts / return sums on either side come from
+    prefix sums, so the cost barely grows with the number of thresholds.
+    """
+    weights = np.asarray(weights, dtype=float)
+    buy_thresholds = np.asarray(buy_thresholds, dtype=float)
+    sell_thresholds = np.asarray(sell_thresholds, dtype=float)
+    n = len(fwd)
+
+    final = weights[:, None] * stock + (1 - weights[:, None]) * tweet  # (weights, obs)
+    order = np.argsort(final, axis=1)
+    final_sorted = np.take_along_axis(final, order, axis=1)
+    ret_sorted = fwd[order]
+
+    def prefix(values):
+        return np.concatenate([np.zeros((len(weights), 1)), np.cumsum(values, axis=1)], axis=1)
+
+    cum_ret, cum_up, cum_down = prefix(ret_sorted), prefix(ret_sorted > 0), prefix(ret_sorted < 0)
+
+    # Scores lie in [0, 1]; shifting row i by 2*i lets one searchsorted serve every row
+    offsets = 2.0 * np.arange(len(weights))[:, None]
+    flat = (final_sorted + offsets).ravel()
+    base = np.arange(len(weights))[:, None] * n
+    not_buy = np.searchsorted(flat, buy_thresholds + offsets, side="right") - base  # final <= buy
+    sells = np.searchsorted(flat, sell_thresholds + offsets, side="left") - base  # final < sell
+
+    def take(cum, idx):
+        return np.take_along_axis(cum, idx, axis=1)
+
+    buys = n - not_buy
+    buy_ret = cum_ret[:, -1:] - take(cum_ret, not_buy)
+    buy_hits = cum_up[:, -1:] - take(cum_up, not_buy)
+    sell_ret = take(cum_ret, sells)
+    sell_hits = take(cum_down, sells)
+
+    # (weights, buy, sell); a short position earns the negated return
+    signals = buys[:, :, None] + sells[:, None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        grid = {
+            "buy_signals": np.broadcast_to(buys[:, :, None], signals.shape),
+            "sell_signals": np.broadcast_to(sells[:, None, :], signals.shape),
+            "buy_hit_rate": np.broadcast_to((buy_hits / buys)[:, :, None], signals.shape),
+            "sell_hit_rate": np.broadcast_to((sell_hits / sells)[:, None, :], signals.shape),
+            "hit_rate": (buy_hits[:, :, None] + sell_hits[:, None, :]) / signals,
+            "buy_mean_return": np.broadcast_to((buy_ret / buys)[:, :, None], signals.shape),
+            "sell_mean_return": np.broadcast_to((sell_ret / sells)[:, None, :], signals.shape),
+            "mean_return": (buy_ret[:, :, None] - sell_ret[:, None, :]) / signals,
+        }
+    w, b, s = np.meshgrid(weights, buy_thresholds, sell_thresholds, indexing="ij")
+    frame = pd.DataFrame({
+        "stock_weight": w.ravel(),
+        "buy_threshold": b.ravel(),
+        "sell_threshold": s.ravel(),
+        **{k: v.ravel() for k, v in grid.items()},
+    })
+    frame["coverage"] = (frame["buy_signals"] + frame["sell_signals"]) / n
+    return frame[frame["sell_threshold"] < frame["buy_threshold"]].reset_index(drop=True)
+
+
+def evaluate_risk_bands(final, pct, fwd, medium_pcts, high_pcts) -> pd.DataFrame:
+    """
+    Realized absolute return per risk band (analyze_company's rule) for each
+    (medium, high) |pct_change| cut-off pair. A useful rule has High > Medium > Low.
+    """
+    medium = np.asarray(medium_pcts, dtype=float)
+    high = np.asarray(high_pcts, dtype=float)
+    m, h = np.meshgrid(medium, high, indexing="ij")
+    m, h = m.ravel()[:, None], h.ravel()[:, None]
+    move = np.abs(pct)[None, :]
+    realized = np.abs(fwd)[None, :]
+
+    extreme = (final < settings.RISK_LOW_SCORE) | (final > settings.RISK_HIGH_SCORE)
+    is_high = (move > h) | extreme[None, :]
+    is_medium = ~is_high & (move > m)
+    is_low = ~is_high & ~is_medium
+
+    frame = pd.DataFrame({"medium_pct": m.ravel(), "high_pct": h.ravel()})
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for band, mask in (("low", is_low), ("medium", is_medium), ("high", is_high)):
+            count = mask.sum(axis=1)
+            frame[f"{band}_count"] = count
+            frame[f"{band}_abs_return"] = (mask * realized).sum(axis=1) / count
+    low, mid, high = frame["low_abs_return"], frame["medium_abs_return"], frame["high_abs_return"]
+    frame["ordered"] = (low < mid) & (mid < high)
+    return frame[frame["medium_pct"] < frame["high_pct"]].reset_index(drop=True)
+
+
+# ---------------------------
+# Entry point
+# ---------------------------
+def run_grid(closes: pd.DataFrame, sentiment: pd.DataFrame, lookback: int = 60, hold: int = 63,
+             weights=DEFAULT_WEIGHTS, buy_thresholds=DEFAULT_BUY_THRESHOLDS,
+             sell_thresholds=DEFAULT_SELL_THRESHOLDS, risk_medium=DEFAULT_RISK_MEDIUM,
+             risk_high=DEFAULT_RISK_HIGH) -> dict:
+    """Pure-NumPy part of the backtest: aligned closes and sentiment in, result tables out."""
+    prices = closes.to_numpy(dtype=float)
+    pct = trend_pct_change(prices, lookback, hold)
+    stock = directional_score(pct)
+    tweet = sentiment.reindex(index=closes.index, columns=closes.columns).to_numpy(dtype=float)
+    fwd = forward_returns(prices, hold)
+
+    valid = ~(np.isnan(stock) | np.isnan(tweet) | np.isnan(fwd))
+    stock, tweet, fwd, pct = stock[valid], tweet[valid], fwd[valid], pct[valid]
+    if not len(fwd):
+        raise ValueError(f"Not enough history: need more than {lookback + hold} sessions")
+
+    grid = evaluate_grid(stock, tweet, fwd, weights, buy_thresholds, sell_thresholds)
+    weight = settings.RECOMMEND_STOCK_WEIGHT
+    current = evaluate_grid(stock, tweet, fwd, [weight],
+                            [settings.RECOMMEND_BUY_THRESHOLD], [settings.RECOMMEND_SELL_THRESHOLD])
+    final = weight * stock + (1 - weight) * tweet
+    risk = evaluate_risk_bands(final, pct, fwd, risk_medium, risk_high)
+    current_risk = evaluate_risk_bands(final, pct, fwd, [settings.RISK_MEDIUM_PCT], [settings.RISK_HIGH_PCT])
+    return {
+        "grid": grid,
+        "current": current.iloc[0].to_dict(),
+        "risk": risk,
+        "current_risk": current_risk.iloc[0].to_dict(),
+        "observations": int(len(fwd)),
+        "baseline_up_rate": float((fwd > 0).mean()),
+        "baseline_mean_return": float(fwd.mean()),
+    }
+
+
+async def run_backtest(tickers=None, years: int = 5, lookback: int = 60, hold: int = 63, **grid_kwargs) -> dict:
+    """
+    Backtest the recommendation rule over every company (or `tickers`).
+    `hold` is in sessions; 63 is roughly the 90 calendar days analyze_company forecasts.
+    """
+    if not tickers:
+        await catalog.ensure_loaded()
+        tickers = [c["ticker"] for c in catalog.companies]
+    closes = await load_closes(tickers, years)
+    sentiment, covered = await load_sentiment(closes.index, closes.columns)
+
+    start = time.perf_counter()
+    result = run_grid(closes, sentiment, lookback=lookback, hold=hold, **grid_kwargs)
+    elapsed = time.perf_counter() - start
+    logger.info("Backtest over %d tickers / %d observations took %.2fs",
+                closes.shape[1], result["observations"], elapsed)
+    return {
+        **result,
+        "tickers": int(closes.shape[1]),
+        "sessions": int(closes.shape[0]),
+        "sentiment_coverage": covered,
+        "grid_seconds": elapsed,
+    }
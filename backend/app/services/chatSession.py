@@ -0,0 +1,189 @@
+# app/services/chatSession.py
+"""
+Conversation state for /chat. The portfolio context is rebuilt server-side
+from the valuations already stored on the user document, the newest turns
+are kept verbatim and everything older is folded into a running summary
+once the history passes CHAT_HISTORY_TOKENS.
+
+Conversations live in the shared cache tier (not the in-process LRU), so the
+next message can land on any worker. With CACHE_BACKEND=none they fall back
+to a per-process MemoryTier, which only works with a single worker.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from app.config import settings
+from app.utils import llmHelper
+from app.utils.metrics import STAGE_SECONDS, record_upstream_error, run_in_thread, stage
+from app.utils.sharedCache import MemoryTier, packb, shared_tier, unpackb
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4  # rough, but good enough to decide when to summarize
+
+SYSTEM_PROMPT = """You are FinTweet's financial assistant. The current user is {username}.
+Holdings (ticker: shares, bought @ price on date, now @ price, total P/L):
+{holdings}
+Give personalized, concise and professional portfolio advice and market analysis,
+referencing specific holdings where relevant. Format answers in markdown."""
+
+SUMMARY_PROMPT = """Summarize this conversation between a user and their financial assistant
+in at most 120 words. Keep tickers, figures and any decisions or preferences the user stated.
+
+{summary}{transcript}"""
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _money(value) -> str:
+    return f"${value:,.2f}" if isinstance(value, (int, float)) else "n/a"
+
+
+def portfolio_context(user: dict) -> str:
+    """System prompt for a user, one short line per holding."""
+    lines = []
+    for item in user.get("portfolio", []):
+        lines.append(
+            f"- {item['companyId']} ({item.get('companyName', item['companyId'])}): "
+            f"{item.get('quantity', 0)} shares, bought @ {_money(item.get('purchasePrice'))} "
+            f"on {item.get('purchaseDate') or 'n/a'}, now @ {_money(item.get('currentPrice'))}, "
+            f"P/L {_money(item.get('totalProfit'))}"
+        )
+    return SYSTEM_PROMPT.format(
+        username=user.get("username") or "Anonymous",
+        holdings="\n".join(lines) or "- none",
+    )
+
+
+class Conversation:
+    def __init__(self, summary: str = "", turns=()):
+        self.summary = summary
+        self.turns = [tuple(turn) for turn in turns]  # [(role, text)], role is "user" or "model"
+
+    def to_dict(self) -> dict:
+        return {"summary": self.summary, "turns": [list(turn) for turn in self.turns]}
+
+    def history_tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(estimate_tokens(text) for _, text in self.turns)
+
+    def messages(self, system_prompt: str, message: str) -> list:
+        if self.summary:
+            system_prompt += f"\n\nEarlier in this conversation: {self.summary}"
+        messages = [SystemMessage(content=system_prompt)]
+        for role, text in self.turns:
+            messages.append(HumanMessage(content=text) if role == "user" else AIMessage(content=text))
+        messages.append(HumanMessage(content=message))
+        return messages
+
+
+class ChatStore:
+    def __init__(self, tier, ttl: float, history_tokens: int, keep_turns: int):
+        self.tier = tier if tier is not None else MemoryTier(settings.CACHE_MAX_BYTES)
+        self.ttl = ttl
+        self.history_tokens = history_tokens
+        self.keep_turns = keep_turns
+        self._locks = {}  # conversation id -> (lock, holders + waiters)
+
+    @staticmethod
+    def _key(user_id, conversation_id: str) -> str:
+        return f"chat_session:{user_id}:{conversation_id}"
+
+    async def _load(self, user_id, conversation_id: str):
+        try:
+            entry = await run_in_thread("cache", self.tier.get, self._key(user_id, conversation_id))
+        except Exception as e:
+            logger.warning("Chat session read failed: %s", e)
+            return None
+        return Conversation(**unpackb(entry[0])) if entry is not None else None
+
+    async def save(self, user_id, conversation_id: str, conversation: Conversation):
+        """Store the conversation; every save restarts its TTL, so active ones don't expire."""
+        try:
+            await run_in_thread("cache", self.tier.set, self._key(user_id, conversation_id),
+                                packb(conversation.to_dict()), self.ttl)
+        except Exception as e:
+            logger.warning("Chat session write failed: %s", e)
+
+    async def open(self, user_id, conversation_id: str = None) -> str:
+        """The id to continue: conversation_id if it's still stored for this user, else a new one."""
+        if conversation_id and await self._load(user_id, conversation_id) is not None:
+            return conversation_id
+        return uuid.uuid4().hex
+
+    @asynccontextmanager
+    async def session(self, user_id, conversation_id: str):
+        """
+        The conversation's latest state, saved again on exit. One message is
+        in flight per conversation within a worker; clients send the next
+        message only after `done`, so that covers the cross-worker case too.
+        """
+        lock, users = self._locks.get(conversation_id, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._locks[conversation_id] = (lock, users + 1)
+        try:
+            async with lock:
+                conversation = await self._load(user_id, conversation_id) or Conversation()
+                try:
+                    yield conversation
+                finally:
+                    await self.save(user_id, conversation_id, conversation)
+        finally:
+            # Dropped only once no other message for this conversation holds or awaits it
+            lock, users = self._locks[conversation_id]
+            if users == 1:
+                del self._locks[conversation_id]
+            else:
+                self._locks[conversation_id] = (lock, users - 1)
+
+    async def reply(self, conversation: Conversation, user: dict, message: str):
+        """Stream the model's answer chunk by chunk, then record the turn (call compact() after)."""
+        llm = await llmHelper.llm_model(temp=0.7)
+        messages = conversation.messages(portfolio_context(user), message)
+        parts = []
+        start = time.perf_counter()
+        try:
+            with stage("llm_call", endpoint="chat"):
+                async for chunk in llm.astream(messages):
+                    if not chunk.content:
+                        continue
+                    if not parts:
+                        STAGE_SECONDS.labels("llm_first_token").observe(time.perf_counter() - start)
+                    parts.append(chunk.content)
+                    yield chunk.content
+        except Exception:
+            record_upstream_error("gemini")
+            raise
+
+        conversation.turns += [("user", message), ("model", "".join(parts))]
+
+    async def compact(self, conversation: Conversation):
+        """Fold all but the newest keep_turns messages into the summary once over budget."""
+        if conversation.history_tokens() <= self.history_tokens or len(conversation.turns) <= self.keep_turns:
+            return
+        older = conversation.turns[:-self.keep_turns]
+        transcript = "\n".join(f"{role}: {text}" for role, text in older)
+        summary = f"Summary so far: {conversation.summary}\n\n" if conversation.summary else ""
+        llm = await llmHelper.llm_model(temp=0.1)
+        try:
+            with stage("llm_call", endpoint="chat_summary"):
+                result = await llm.ainvoke(SUMMARY_PROMPT.format(summary=summary, transcript=transcript))
+        except Exception as e:
+            # Keep the full history; we'll try again after the next message
+            record_upstream_error("gemini")
+            logger.warning("Chat summarization failed: %s", e)
+            return
+        conversation.summary = result.content.strip()
+        conversation.turns = conversation.turns[-self.keep_turns:]
+
+
+chat_store = ChatStore(
+    shared_tier,
+    ttl=settings.CHAT_SESSION_TTL,
+    history_tokens=settings.CHAT_HISTORY_TOKENS,
+    keep_turns=settings.CHAT_KEEP_TURNS,
+)
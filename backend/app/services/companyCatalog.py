@@ -0,0 +1,88 @@
+# app/services/companyCatalog.py
+"""
+In-memory copy of db.companies: loaded at startup, kept current through a
+change stream (or TTL polling where change streams aren't available), and
+served with an ETag so unchanged catalogues cost a 304.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+from app.utils.metrics import record_cache, stage
+
+logger = logging.getLogger(__name__)
+
+client = AsyncIOMotorClient(settings.MONGODB_URL)
+db = client[settings.DATABASE_NAME]
+
+
+class CompanyCatalog:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.companies = []
+        self.etag = None
+        self._by_ticker = {}
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def load(self):
+        """Re-read the collection and swap in the new catalogue atomically."""
+        with stage("db_fetch", collection="companies"):
+            companies = [
+                {"ticker": c["ticker"], "name": c["name"]}
+                async for c in db.companies.find({}, {"_id": 0, "ticker": 1, "name": 1})
+            ]
+        payload = json.dumps(companies, sort_keys=True, separators=(",", ":")).encode()
+        etag = '"' + hashlib.sha1(payload).hexdigest()[:20] + '"'
+        if etag != self.etag:
+            logger.info("Company catalogue loaded: %d companies", len(companies))
+        self.companies = companies
+        self._by_ticker = {c["ticker"]: c for c in companies}
+        self.etag = etag
+        self._loaded_at = time.monotonic()
+
+    async def ensure_loaded(self):
+        """Load on first use or once the TTL has lapsed (only one caller reloads)."""
+        fresh = self.etag is not None and time.monotonic() - self._loaded_at < self.ttl
+        record_cache("company_catalog", fresh)
+        if fresh:
+            return
+        async with self._lock:
+            if self.etag is None or time.monotonic() - self._loaded_at >= self.ttl:
+                await self.load()
+
+    def get(self, ticker: str):
+        """O(1) lookup; None if the ticker isn't supported."""
+        return self._by_ticker.get(ticker.upper())
+
+    def name(self, ticker: str) -> str:
+        company = self._by_ticker.get(ticker.upper())
+        return company["name"] if company else ticker
+
+    async def watch_forever(self):
+        """Reload on every change to db.companies; poll every TTL if change streams are unsupported."""
+        try:
+            async with db.companies.watch() as stream:
+                logger.info("Watching companies change stream")
+                async for _ in stream:
+                    await self.load()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Standalone mongod (and mongomock) have no change streams
+            logger.info("Companies change stream unavailable (%s); polling every %ss", e, self.ttl)
+
+        while True:
+            await asyncio.sleep(self.ttl)
+            try:
+                await self.load()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Company catalogue refresh failed")
+
+
+catalog = CompanyCatalog(ttl=settings.CATALOG_TTL)
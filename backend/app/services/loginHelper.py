@@ -1,9 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel, EmailStr
 from motor.motor_asyncio import AsyncIOMotorClient
 from passlib.context import CryptContext
 from jose import jwt
 from datetime import datetime, timedelta
 from app.config import settings
+from app.utils.metrics import run_in_pool
 
 # MongoDB client
 client = AsyncIOMotorClient(settings.MONGODB_URL)
@@ -11,6 +13,10 @@ db = client[settings.DATABASE_NAME]
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is deliberately slow (~100-300 ms); keep it off the event loop and
+# bounded so a login storm can't starve every other worker thread.
+bcrypt_pool = ThreadPoolExecutor(max_workers=settings.BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+
 # JWT settings
 SECRET_KEY = settings.JWT_SECRET
 ALGORITHM = "HS256"
@@ -37,6 +43,14 @@ def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    return await run_in_pool("bcrypt", bcrypt_pool, pwd_context.verify, plain_password, hashed_password)
+
+
+async def hash_password_async(plain_password) -> str:
+    return await run_in_pool("bcrypt", bcrypt_pool, pwd_context.hash, plain_password)
+
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
@@ -0,0 +1,101 @@
+# app/services/marketSnapshot.py
+"""
+Latest price / previous close / daily change for the whole company list,
+computed from one multi-ticker download and shared by every client.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+import pandas as pd
+from app.config import settings
+from app.services.companyCatalog import catalog
+from app.services.yahoo_client import UpstreamUnavailable, yahoo
+from app.utils.cache import TTLCache
+from app.utils.metrics import run_in_thread, stage
+
+logger = logging.getLogger(__name__)
+
+
+def compute_quotes(tickers) -> dict:
+    """One yf.download for all tickers -> {ticker: quote}. Blocking."""
+    result = yahoo.download(sorted(tickers), period="5d")
+    closes = result.data["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(name=next(iter(tickers)))
+
+    quotes = {}
+    for ticker in closes.columns:
+        valid = closes[ticker].dropna()
+        if valid.empty:
+            continue
+        last = float(valid.iloc[-1])
+        # None, not NaN, when there's no earlier close in the window (new listing, sparse data)
+        previous = float(valid.iloc[-2]) if len(valid) > 1 else None
+        change = last - previous if previous is not None else None
+        quotes[str(ticker)] = {
+            "ticker": str(ticker),
+            "currentPrice": round(last, 2),
+            "previousClose": round(previous, 2) if previous is not None else None,
+            "dailyChange": round(change, 2) if change is not None else None,
+            "dailyChangePct": round(change / previous * 100, 4) if previous else None,
+        }
+    return {"quotes": quotes, "stale": result.stale, "asOf": datetime.now(timezone.utc).isoformat()}
+
+
+class MarketSnapshot:
+    def __init__(self, ttl: float, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._cache = TTLCache("market_snapshot", ttl=ttl, maxsize=1)
+        self._lock = asyncio.Lock()
+
+    async def _build(self) -> dict:
+        await catalog.ensure_loaded()
+        wanted = {c["ticker"] for c in catalog.companies}
+        if not wanted:
+            return {"quotes": {}, "stale": False, "asOf": datetime.now(timezone.utc).isoformat()}
+        with stage("download", tickers=len(wanted)):
+            snapshot = await run_in_thread("yahoo", compute_quotes, wanted)
+        for ticker, quote in snapshot["quotes"].items():
+            quote["name"] = catalog.name(ticker)
+        return snapshot
+
+    async def get(self, tickers=None) -> dict:
+        """
+        Snapshot for all companies (tickers=None) or a subset, always sliced
+        from the shared full snapshot: callers validate tickers against the
+        company catalogue, and ones Yahoo had no price for are left out.
+        """
+        full = await self._get_full()
+        if not tickers:
+            return full
+        tickers = sorted({t.strip().upper() for t in tickers if t.strip()})
+        return {**full, "quotes": {t: full["quotes"][t] for t in tickers if t in full["quotes"]}}
+
+    async def _get_full(self) -> dict:
+        snapshot = self._cache.get("*")
+        if snapshot is not None:
+            return snapshot
+        # One download no matter how many requests miss at once
+        async with self._lock:
+            snapshot = self._cache.get("*")
+            if snapshot is None:
+                snapshot = await self._build()
+                self._cache.set("*", snapshot)
+        return snapshot
+
+    async def refresh_forever(self):
+        """Keep the full snapshot warm so page views never wait on Yahoo."""
+        while True:
+            try:
+                async with self._lock:
+                    self._cache.set("*", await self._build())
+            except asyncio.CancelledError:
+                raise
+            except UpstreamUnavailable as e:
+                logger.warning("Market snapshot refresh failed: %s", e)
+            except Exception:
+                logger.exception("Market snapshot refresh failed")
+            await asyncio.sleep(self.refresh_interval)
+
+
+market_snapshot = MarketSnapshot(ttl=settings.SNAPSHOT_TTL, refresh_interval=settings.SNAPSHOT_REFRESH_SECONDS)
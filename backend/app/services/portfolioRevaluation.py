@@ -0,0 +1,246 @@
+# app/services/portfolioRevaluation.py
+"""
+Revalues every user's portfolio in one job instead of per request.
+
+Pass 1 reads only (companyId, purchaseDate) from db.users and collects the
+distinct tickers and purchase dates. One multi-ticker download then answers
+every purchase price and current price. Pass 2 streams the portfolios in
+cursor batches, computes P&L for a whole batch with NumPy, and writes it
+back with an unordered bulk_write. A user whose portfolio changed after it
+was read is left for the next run.
+
+revalue_forever() runs the job on one worker at a time across every host,
+coordinated by a lease document in db.jobLeases.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import date, datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from app.config import settings
+from app.services.companyCatalog import catalog
+from app.services.yahoo_client import UpstreamUnavailable, yahoo
+from app.utils.metrics import run_in_thread, stage
+
+logger = logging.getLogger(__name__)
+
+client = AsyncIOMotorClient(settings.MONGODB_URL)
+db = client[settings.DATABASE_NAME]
+
+# Same look-back as get_stock_price_on_date(): covers weekends and holidays
+PURCHASE_LOOKBACK = timedelta(days=7)
+LEASE_KEY = "portfolio_revaluation"
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+class PriceBook:
+    """Purchase-date and current closes for many tickers, from one download."""
+
+    def __init__(self, closes: pd.DataFrame, stale: bool):
+        self.stale = stale
+        self._dates = {}
+        self._values = {}
+        for ticker in closes.columns:
+            series = closes[ticker].dropna()
+            index = series.index.tz_localize(None) if series.index.tz is not None else series.index
+            self._dates[ticker] = index.values.astype("datetime64[D]")
+            self._values[ticker] = np.round(series.to_numpy(dtype=float), 2)
+
+    @classmethod
+    def fetch(cls, tickers, earliest: date) -> "PriceBook":
+        """Blocking."""
+        if not tickers:
+            return cls(pd.DataFrame(), False)
+        start = (earliest - PURCHASE_LOOKBACK).isoformat()
+        end = (date.today() + timedelta(days=1)).isoformat()
+        result = yahoo.download(sorted(tickers), start=start, end=end)
+        closes = result.data["Close"]
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(name=next(iter(tickers)))
+        return cls(closes, result.stale)
+
+    def current(self, tickers: np.ndarray) -> np.ndarray:
+        """Latest close per ticker (NaN if unknown)."""
+        return np.array([v[-1] if len(v) else np.nan for v in (self._values.get(t, ()) for t in tickers)])
+
+    def on_date(self, tickers: np.ndarray, days: np.ndarray) -> np.ndarray:
+        """Close on each day, or the last one at most PURCHASE_LOOKBACK before it (NaN otherwise)."""
+        prices = np.full(len(tickers), np.nan)
+        for ticker in np.unique(tickers):
+            if ticker not in self._dates:
+                continue
+            rows = np.flatnonzero(tickers == ticker)
+            wanted = days[rows]
+            dates, values = self._dates[ticker], self._values[ticker]
+            at = np.searchsorted(dates, wanted, side="right") - 1
+            ok = (at >= 0) & ~np.isnat(wanted)
+            ok[ok] &= dates[at[ok]] >= wanted[ok] - np.timedelta64(PURCHASE_LOOKBACK.days, "D")
+            prices[rows[ok]] = values[at[ok]]
+        return prices
+
+
+def is_fresh(user: dict) -> bool:
+    """True if the stored valuations are younger than REVALUE_MAX_AGE."""
+    valued_at = user.get("valuedAt")
+    if not isinstance(valued_at, datetime):
+        return False
+    if valued_at.tzinfo is None:  # Mongo hands back naive UTC
+        valued_at = valued_at.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - valued_at).total_seconds() < settings.REVALUE_MAX_AGE
+
+
+def value_batch(users: list, prices: PriceBook) -> list:
+    """
+    UpdateOne per user with every holding priced and the summed profit.
+    Matches value_holding(): unknown prices stay None and don't count.
+    """
+    owner, tickers, quantities, days = [], [], [], []
+    for i, user in enumerate(users):
+        for item in user.get("portfolio", []):
+            owner.append(i)
+            tickers.append(item.get("companyId"))
+            quantities.append(item.get("quantity") or 0)
+            parsed = _parse_date(item.get("purchaseDate"))
+            days.append(np.datetime64(parsed, "D") if parsed else np.datetime64("NaT", "D"))
+
+    owner = np.asarray(owner, dtype=int)
+    tickers = np.asarray(tickers, dtype=object)
+    quantities = np.asarray(quantities, dtype=float)
+    days = np.asarray(days, dtype="datetime64[D]")
+
+    purchase = prices.on_date(tickers, days)
+    current = prices.current(tickers)
+    per_share = current - purchase
+    total = per_share * quantities
+    profit = np.bincount(owner, weights=np.nan_to_num(total), minlength=len(users))
+
+    def optional(value):
+        return None if np.isnan(value) else float(value)
+
+    updates, k = [], 0
+    valued_at = datetime.now(timezone.utc)
+    for i, user in enumerate(users):
+        portfolio = []
+        for item in user.get("portfolio", []):
+            portfolio.append({
+                **item,
+                "purchasePrice": optional(purchase[k]),
+                "currentPrice": optional(current[k]),
+                "profitPerShare": optional(per_share[k]),
+                "totalProfit": optional(total[k]),
+                "priceStale": prices.stale,
+                "companyName": catalog.name(item.get("companyId") or ""),
+            })
+            k += 1
+        # Only if the portfolio is still what we read; otherwise the next run picks it up
+        updates.append(UpdateOne(
+            {"_id": user["_id"], "portfolio": user.get("portfolio", [])},
+            {"$set": {"portfolio": portfolio, "profit": float(profit[i]), "valuedAt": valued_at}},
+        ))
+    return updates
+
+
+async def revalue_all(batch_size: int = None) -> dict:
+    """Revalue every portfolio; returns counts and throughput."""
+    batch_size = batch_size or settings.REVALUE_BATCH_SIZE
+    started = time.perf_counter()
+    await catalog.ensure_loaded()
+
+    # Pass 1: distinct tickers and the earliest purchase date
+    tickers, earliest = set(), date.today()
+    with stage("db_fetch", collection="users"):
+        cursor = db.users.find({"portfolio.0": {"$exists": True}},
+                               {"portfolio.companyId": 1, "portfolio.purchaseDate": 1}).batch_size(batch_size)
+        async for user in cursor:
+            for item in user.get("portfolio", []):
+                if item.get("companyId"):
+                    tickers.add(item["companyId"])
+                parsed = _parse_date(item.get("purchaseDate"))
+                if parsed and parsed < earliest:
+                    earliest = parsed
+
+    with stage("download", tickers=len(tickers)):
+        prices = await run_in_thread("yahoo", PriceBook.fetch, tickers, earliest)
+
+    # Pass 2: price each batch of portfolios and write it back
+    users = matched = 0
+    cursor = db.users.find({"portfolio.0": {"$exists": True}}, {"portfolio": 1}).batch_size(batch_size)
+    batch = []
+
+    async def flush():
+        nonlocal matched
+        with stage("revalue_batch", users=len(batch)):
+            updates = value_batch(batch, prices)
+            result = await db.users.bulk_write(updates, ordered=False)
+        matched += result.matched_count
+        batch.clear()
+
+    async for user in cursor:
+        batch.append(user)
+        users += 1
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "users": users,
+        "updated": matched,
+        "skipped": users - matched,  # portfolio changed mid-run
+        "tickers": len(tickers),
+        "stale": prices.stale,
+        "seconds": round(elapsed, 3),
+        "users_per_second": round(users / elapsed, 1) if elapsed else 0.0,
+    }
+    logger.info("Revalued %(updated)d/%(users)d portfolios over %(tickers)d tickers in %(seconds).2fs "
+                "(%(users_per_second).0f users/s)", summary)
+    return summary
+
+
+async def acquire_lease(name: str, seconds: float) -> bool:
+    """
+    Take db.jobLeases[name] for `seconds` if it's free or expired. The
+    upsert only matches an expired lease; a live one makes it insert a
+    duplicate _id, which fails, so exactly one caller wins.
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        await db.jobLeases.update_one(
+            {"_id": name, "expiresAt": {"$lte": now}},
+            {"$set": {"expiresAt": now + timedelta(seconds=seconds), "holder": WORKER_ID}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+async def revalue_forever():
+    """Run revalue_all() every REVALUE_INTERVAL seconds on one worker at a time."""
+    interval = settings.REVALUE_INTERVAL
+    while True:
+        try:
+            # The lease lapses on its own, so a crashed worker doesn't block the next run
+            if await acquire_lease(LEASE_KEY, interval * 0.9):
+                await revalue_all()
+        except asyncio.CancelledError:
+            raise
+        except UpstreamUnavailable as e:
+            logger.warning("Portfolio revaluation skipped: %s", e)
+        except Exception:
+            logger.exception("Portfolio revaluation failed")
+        await asyncio.sleep(interval)
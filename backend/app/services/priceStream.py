@@ -0,0 +1,130 @@
+# app/services/priceStream.py
+"""
+Live quotes pushed to WebSocket clients. Each ticker that at least one client
+watches gets exactly one poller; its quotes are fanned out to every
+subscriber, so upstream load grows with distinct tickers, not with users.
+"""
+import asyncio
+import logging
+from app.config import settings
+from app.services.marketSnapshot import compute_quotes
+from app.services.yahoo_client import UpstreamUnavailable
+from app.utils.metrics import PRICE_STREAM_COALESCED, PRICE_STREAM_POLLERS, run_in_thread, stage
+from app.utils.sharedCache import SharedCache, shared_tier
+
+logger = logging.getLogger(__name__)
+
+# Pollers in other workers on this host reuse the same fetch
+live_quote_cache = SharedCache("live_quote", shared_tier, ttl=settings.PRICE_STREAM_INTERVAL, local_items=512)
+
+# A poll that changes none of these isn't sent
+QUOTE_FIELDS = ("currentPrice", "previousClose", "dailyChange", "dailyChangePct", "stale")
+
+
+def fetch_live_quote(ticker: str):
+    """Latest quote for one ticker, or None if Yahoo has nothing. Blocking."""
+    def fetch():
+        snapshot = compute_quotes({ticker})
+        quote = snapshot["quotes"].get(ticker)
+        return {**quote, "stale": snapshot["stale"], "asOf": snapshot["asOf"]} if quote else None
+
+    return live_quote_cache.get_or_compute(ticker, fetch, cache_if=lambda q: q is not None and not q["stale"])
+
+
+class Subscriber:
+    """
+    One connected client. Undelivered quotes are kept per ticker and a newer
+    quote replaces an older one, so a slow client skips intermediate prices
+    instead of growing a backlog.
+    """
+
+    def __init__(self):
+        self.tickers = set()
+        self._pending = {}
+        self._ready = asyncio.Event()
+
+    def offer(self, quote: dict):
+        if quote["ticker"] in self._pending:
+            PRICE_STREAM_COALESCED.inc()
+        self._pending[quote["ticker"]] = quote
+        self._ready.set()
+
+    async def next_batch(self) -> list:
+        """Wait for at least one undelivered quote and take all of them."""
+        await self._ready.wait()
+        self._ready.clear()
+        batch, self._pending = self._pending, {}
+        return list(batch.values())
+
+
+class PriceHub:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._subscribers = {}  # ticker -> set of Subscriber
+        self._pollers = {}  # ticker -> asyncio.Task
+        self._latest = {}  # ticker -> last quote sent out
+
+    def subscribe(self, subscriber: Subscriber, tickers):
+        for ticker in tickers:
+            if ticker in subscriber.tickers:
+                continue
+            subscriber.tickers.add(ticker)
+            self._subscribers.setdefault(ticker, set()).add(subscriber)
+            if ticker in self._latest:
+                subscriber.offer(self._latest[ticker])
+            if ticker not in self._pollers:
+                self._pollers[ticker] = asyncio.create_task(self._poll(ticker))
+                PRICE_STREAM_POLLERS.inc()
+
+    def unsubscribe(self, subscriber: Subscriber, tickers=None):
+        """Drop some (or all) of a client's tickers; the last one out stops the poller."""
+        for ticker in list(subscriber.tickers if tickers is None else tickers):
+            subscriber.tickers.discard(ticker)
+            watchers = self._subscribers.get(ticker)
+            if watchers is None:
+                continue
+            watchers.discard(subscriber)
+            if not watchers:
+                del self._subscribers[ticker]
+                self._latest.pop(ticker, None)
+                self._pollers.pop(ticker).cancel()
+                PRICE_STREAM_POLLERS.dec()
+
+    def watched(self) -> int:
+        return len(self._pollers)
+
+    def _publish(self, ticker: str, quote: dict):
+        previous = self._latest.get(ticker)
+        if previous is not None and all(previous[f] == quote[f] for f in QUOTE_FIELDS):
+            return
+        self._latest[ticker] = quote
+        for subscriber in self._subscribers.get(ticker, ()):
+            subscriber.offer(quote)
+
+    async def _poll(self, ticker: str):
+        while True:
+            try:
+                with stage("download", tickers=1):
+                    quote = await run_in_thread("yahoo", fetch_live_quote, ticker)
+                if quote is not None:
+                    self._publish(ticker, quote)
+            except asyncio.CancelledError:
+                raise
+            except UpstreamUnavailable as e:
+                logger.warning("Live quote for %s unavailable: %s", ticker, e)
+            except Exception:
+                logger.exception("Live quote poll for %s failed", ticker)
+            await asyncio.sleep(self.interval)
+
+    async def close(self):
+        tasks = list(self._pollers.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        PRICE_STREAM_POLLERS.dec(len(tasks))
+        self._pollers.clear()
+        self._subscribers.clear()
+        self._latest.clear()
+
+
+price_hub = PriceHub(interval=settings.PRICE_STREAM_INTERVAL)
@@ -1,12 +1,19 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
-from datetime import datetime, timedelta
-import yfinance as yf
+import logging
 
 from app.config import settings
+from app.services.companyCatalog import catalog
+from app.services.portfolioRevaluation import is_fresh
+from app.services.yfinance_helper import get_stock_price_on_date, get_stock_quote
+from app.utils.metrics import run_in_thread, stage
+from app.utils.sharedCache import SharedCache, shared_tier
+
+logger = logging.getLogger(__name__)
 
 SECRET_KEY = settings.JWT_SECRET
 ALGORITHM = "HS256"
@@ -16,90 +23,116 @@ db = client[settings.DATABASE_NAME]
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# User documents (minus the password hash) shared by every worker for TOKEN_CACHE_TTL
+# seconds. /user/update and request-time re-pricing drop the entry; the revaluation
+# job's writes show up once it expires. No local copy, so no worker serves its own.
+user_cache = SharedCache("user", shared_tier, ttl=settings.TOKEN_CACHE_TTL, local_items=0)
 
-# Helper: fetch stock price on a specific date (purchase date)
-def get_stock_price_on_date(ticker: str, date_str: str) -> float:
-    """Fetch the closing price of the stock near the given purchase date."""
-    try:
-        date = datetime.strptime(date_str, "%Y-%m-%d").date()
 
-        # Download small window around purchase date
-        start = date - timedelta(days=3)
-        end = date + timedelta(days=3)
+def verify_token(token: str) -> dict:
+    """Decode a bearer token into {"user_id", "email", "exp"}."""
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    user_id = payload.get("sub")
+    # A sub that isn't an ObjectId would otherwise surface as a 500 (or an unclosed socket)
+    if not isinstance(user_id, str) or not ObjectId.is_valid(user_id):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return {"user_id": user_id, "email": payload.get("email"), "exp": payload.get("exp")}
 
-        data = yf.download(ticker, start=start, end=end, progress=False)
 
-        if not data.empty:
-            # Get closest available trading day price
-            closest_date = data.index[-1]
-            price = float(data.loc[closest_date]["Close"])
-            return price
-        else:
-            return 0.0
-    except Exception as e:
-        print(f"⚠️ Error fetching purchase price for {ticker}: {e}")
-        return 0.0
+def _snapshot(user: dict) -> dict:
+    """msgpack-safe copy of a user document for the shared cache."""
+    valued_at = user.get("valuedAt")
+    return {**user, "_id": str(user["_id"]),
+            "valuedAt": valued_at.isoformat() if isinstance(valued_at, datetime) else valued_at}
 
 
-# Helper: fetch current price
-def get_current_price(ticker: str) -> float:
-    try:
-        data = yf.Ticker(ticker)
-        price = data.history(period="1d")["Close"].iloc[-1]
-        return float(price)
-    except Exception as e:
-        print(f"⚠️ Error fetching current price for {ticker}: {e}")
-        return 0.0
+def _restore(snapshot: dict) -> dict:
+    valued_at = snapshot.get("valuedAt")
+    return {**snapshot, "_id": ObjectId(snapshot["_id"]),
+            "valuedAt": datetime.fromisoformat(valued_at) if isinstance(valued_at, str) else valued_at}
+
+
+async def resolve_token(token: str) -> dict:
+    """Verify a bearer token and load its user document (without the password hash)."""
+    identity = verify_token(token)
+
+    async def load():
+        with stage("db_fetch", collection="users"):
+            user = await db.users.find_one({"_id": ObjectId(identity["user_id"])}, {"password": 0})
+        return _snapshot(user) if user else None
+
+    snapshot = await user_cache.aget_or_compute(identity["user_id"], load, cache_if=lambda u: u is not None)
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="User not found")
+    return _restore(snapshot)
+
+
+def value_holding(ticker: str, quantity: int, purchase_date: str) -> dict:
+    """
+    Price one portfolio line. Prices Yahoo can't provide are left as None
+    (and excluded from profit) rather than counted as $0.
+    """
+    purchase_price = get_stock_price_on_date(ticker, purchase_date) if purchase_date else None
+    quote = get_stock_quote(ticker)
+    current_price = quote["price"] if quote else None
+
+    if purchase_price is None or current_price is None:
+        profit_per_share = None
+        total_item_profit = None
+    else:
+        profit_per_share = current_price - purchase_price
+        total_item_profit = profit_per_share * quantity
+
+    return {
+        "purchasePrice": purchase_price,
+        "currentPrice": current_price,
+        "profitPerShare": profit_per_share,
+        "totalProfit": total_item_profit,
+        "priceStale": bool(quote and quote["stale"]),
+    }
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token")
+        user = await resolve_token(token)
+        user_id = user["_id"]
 
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        # The revaluation job keeps these current; only re-price when they're old
+        if is_fresh(user):
+            user["_id"] = str(user_id)
+            return user
 
         total_profit = 0.0
         updated_portfolio = []
+        await catalog.ensure_loaded()
 
         for item in user.get("portfolio", []):
             ticker = item["companyId"]
             quantity = item["quantity"]
             purchase_date = item.get("purchaseDate")
 
-            # ✅ Fetch purchase price based on the purchase date
-            purchase_price = get_stock_price_on_date(ticker, purchase_date)
-
-            # ✅ Fetch latest price
-            current_price = get_current_price(ticker)
-
-            # ✅ Compute profit/loss
-            profit_per_share = current_price - purchase_price
-            total_item_profit = profit_per_share * quantity
-            total_profit += total_item_profit
+            # ✅ Fetch purchase + latest price and compute profit/loss
+            valuation = await run_in_thread("yahoo", value_holding, ticker, quantity, purchase_date)
+            if valuation["totalProfit"] is not None:
+                total_profit += valuation["totalProfit"]
 
             # ✅ Get company name
-            company = await db.companies.find_one({"ticker": ticker})
-            company_name = company["name"] if company else ticker
+            company_name = catalog.name(ticker)
 
             updated_portfolio.append({
                 **item,
-                "purchasePrice": purchase_price,
-                "currentPrice": current_price,
-                "profitPerShare": profit_per_share,
-                "totalProfit": total_item_profit,
+                **valuation,
                 "companyName": company_name
             })
 
-        # ✅ Update in database
+        # ✅ Update in database, unless a /user/update or the revaluation job wrote since we read
         await db.users.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$set": {"portfolio": updated_portfolio, "profit": total_profit}}
+            {"_id": ObjectId(user_id), "portfolio": user.get("portfolio", []),
+             "valuedAt": user.get("valuedAt")},
+            {"$set": {"portfolio": updated_portfolio, "profit": total_profit,
+                      "valuedAt": datetime.now(timezone.utc)}}
         )
+        await user_cache.ainvalidate(str(user_id))
 
         user["portfolio"] = updated_portfolio
         user["profit"] = total_profit
@@ -109,3 +142,14 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
 
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+
+
+async def get_user_identity(token: str = Depends(oauth2_scheme)):
+    """
+    Like get_current_user() but without re-pricing the portfolio: holdings
+    carry the valuations stored by the last refresh.
+    """
+    try:
+        return await resolve_token(token)
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
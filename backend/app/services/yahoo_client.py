@@ -0,0 +1,221 @@
+# app/services/yahoo_client.py
+"""
+Single gateway for every Yahoo Finance call.
+
+Calls are rate limited (token bucket), capped in concurrency, retried with
+jittered exponential backoff and guarded by a circuit breaker. When Yahoo is
+unavailable the last good response for the same request is served with
+stale=True instead of failing.
+
+yfinance turns throttling and most errors into empty frames, so an empty
+frame counts as a failure like any other. Requests that come back empty
+with nothing to fall back on (usually unknown or delisted tickers) are
+remembered for a few minutes and answered with EmptyResponse without
+calling Yahoo, so they can't keep feeding the breaker.
+"""
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+import yfinance as yf
+from app.config import settings
+from app.utils.cache import TTLCache
+from app.utils.metrics import record_cache, record_upstream_error
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailable(Exception):
+    """Yahoo failed (or the breaker is open) and nothing is cached for the request."""
+
+
+class EmptyResponse(UpstreamUnavailable):
+    """Every attempt came back empty and nothing is cached (often an unknown or delisted ticker)."""
+
+
+class UpstreamResult:
+    def __init__(self, data: pd.DataFrame, stale: bool, fetched_at: float):
+        self.data = data
+        self.stale = stale
+        self.fetched_at = fetched_at
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures;
+    open -> half-open after `reset_timeout` seconds, letting one trial call through.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = "closed"
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning("Yahoo circuit breaker opened after %d failures", self._failures)
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+def _yf_history(ticker: str, **kwargs) -> pd.DataFrame:
+    return yf.Ticker(ticker).history(**kwargs)
+
+
+def _yf_download(tickers, **kwargs) -> pd.DataFrame:
+    return yf.download(tickers, progress=False, **kwargs)
+
+
+class YahooClient:
+    def __init__(
+        self,
+        fetch_history=_yf_history,
+        fetch_download=_yf_download,
+        rate: float = 5.0,
+        burst: int = 10,
+        max_concurrency: int = 4,
+        retries: int = 2,
+        backoff: float = 0.5,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        fallback_size: int = 1024,
+        empty_ttl: float = 300.0,
+    ):
+        self.fetch_history = fetch_history
+        self.fetch_download = fetch_download
+        self.retries = retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._fallback = OrderedDict()
+        self._fallback_size = fallback_size
+        self._fallback_lock = threading.Lock()
+        self._empty = TTLCache("yahoo_empty", ttl=empty_ttl, maxsize=fallback_size)
+
+    # ---------------------------
+    # Public API
+    # ---------------------------
+    def history(self, ticker: str, **kwargs) -> UpstreamResult:
+        """Ticker(ticker).history(**kwargs) through the limiter / breaker."""
+        key = ("history", ticker.upper(), tuple(sorted(kwargs.items())))
+        return self._call(key, lambda: self.fetch_history(ticker, **kwargs))
+
+    def download(self, tickers, **kwargs) -> UpstreamResult:
+        """yf.download(tickers, **kwargs) through the limiter / breaker."""
+        if not isinstance(tickers, str):
+            tickers = " ".join(sorted(t.upper() for t in tickers))
+        key = ("download", tickers.upper(), tuple(sorted(kwargs.items())))
+        return self._call(key, lambda: self.fetch_download(tickers, **kwargs))
+
+    # ---------------------------
+    # Internals
+    # ---------------------------
+    def _call(self, key, fetch) -> UpstreamResult:
+        if self._empty.get(key) is not None:
+            raise EmptyResponse(f"Yahoo had no data for {key[0]} {key[1]} (recently)")
+        last_error = None
+        if self.breaker.allow():
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    # Full jitter: sleep somewhere in [0, backoff * 2^attempt)
+                    time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+                self.bucket.acquire()
+                try:
+                    with self._slots:
+                        data = fetch()
+                    if data is None or data.empty:
+                        raise EmptyResponse(f"empty response for {key[1]}")
+                except Exception as e:
+                    last_error = e
+                    record_upstream_error("yahoo")
+                    self.breaker.record_failure()
+                    logger.debug("Yahoo %s %s failed (attempt %d): %s", key[0], key[1], attempt + 1, e)
+                    if not self.breaker.allow():
+                        break
+                    continue
+                self.breaker.record_success()
+                result = UpstreamResult(data, stale=False, fetched_at=time.time())
+                self._remember(key, result)
+                return result
+
+        cached = self._recall(key)
+        record_cache("yahoo_fallback", cached is not None)
+        if cached is not None:
+            if last_error is not None:
+                logger.warning("Serving stale Yahoo data for %s %s: %s", key[0], key[1], last_error)
+            else:
+                logger.debug("Circuit open, serving stale Yahoo data for %s %s", key[0], key[1])
+            return UpstreamResult(cached.data, stale=True, fetched_at=cached.fetched_at)
+        if isinstance(last_error, EmptyResponse):
+            logger.info("Yahoo %s %s returned no data; not asking again for a while", key[0], key[1])
+            self._empty.set(key, True)
+            raise EmptyResponse(f"Yahoo had no data for {key[0]} {key[1]}")
+        raise UpstreamUnavailable(f"Yahoo {key[0]} {key[1]} failed: {last_error or 'circuit open'}")
+
+    def _remember(self, key, result: UpstreamResult):
+        with self._fallback_lock:
+            self._fallback[key] = result
+            self._fallback.move_to_end(key)
+            while len(self._fallback) > self._fallback_size:
+                self._fallback.popitem(last=False)
+
+    def _recall(self, key):
+        with self._fallback_lock:
+            return self._fallback.get(key)
+
+
+yahoo = YahooClient(
+    rate=settings.YAHOO_RATE_PER_SEC,
+    burst=settings.YAHOO_BURST,
+    max_concurrency=settings.YAHOO_MAX_CONCURRENCY,
+    retries=settings.YAHOO_RETRIES,
+)
@@ -1,50 +1,74 @@
-import yfinance as yf
+import logging
 from datetime import datetime, timedelta
+from typing import Optional
+from app.config import settings
+from app.services.yahoo_client import UpstreamUnavailable, yahoo
+from app.utils.sharedCache import SharedCache, shared_tier
 
-def get_stock_price(ticker: str) -> float:
+logger = logging.getLogger(__name__)
+
+# Shared across workers; stale (fallback) answers are never stored
+quote_cache = SharedCache("quote", shared_tier, ttl=settings.QUOTE_CACHE_TTL, local_items=512)
+# A past close doesn't change; a day bounds the damage of a bad upstream answer
+price_on_date_cache = SharedCache("price_on_date", shared_tier, ttl=86400.0, local_items=4096)
+history_cache = SharedCache("history", shared_tier, ttl=settings.HISTORY_CACHE_TTL, local_items=256)
+
+
+def get_stock_quote(ticker: str) -> Optional[dict]:
     """
-    Fetch the latest stock closing price for today.
+    Latest closing price as {"price", "stale"}; stale=True means Yahoo is
+    failing and this is the last known value. None if nothing is available.
     """
-    try:
-        stock = yf.Ticker(ticker)
-        data = stock.history(period="1d")
-        if not data.empty:
-            return round(data['Close'].iloc[-1], 2)
-        return 0.0
-    except Exception as e:
-        print(f"Error fetching current price for {ticker}: {e}")
-        return 0.0
+    def fetch():
+        try:
+            result = yahoo.history(ticker, period="1d")
+            return {"price": round(float(result.data['Close'].iloc[-1]), 2), "stale": result.stale}
+        except UpstreamUnavailable as e:
+            logger.warning("Error fetching current price for %s: %s", ticker, e)
+            return None
 
+    return quote_cache.get_or_compute(ticker.upper(), fetch, cache_if=lambda q: q is not None and not q["stale"])
 
-def get_stock_price_on_date(ticker: str, date_str: str) -> float:
+
+def get_stock_price(ticker: str) -> Optional[float]:
     """
-    Fetch historical closing price on a given date (YYYY-MM-DD).
+    Fetch the latest stock closing price for today (None if unavailable).
+    """
+    quote = get_stock_quote(ticker)
+    return quote["price"] if quote else None
+
+
+def get_stock_price_on_date(ticker: str, date_str: str) -> Optional[float]:
+    """
+    Fetch historical closing price on a given date (YYYY-MM-DD), or the
+    last close before it if the market was closed. None if unavailable.
     """
     try:
         date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-        stock = yf.Ticker(ticker)
-        # Fetch 1 day before and 1 day after to avoid missing data if market closed
-        start = date_obj.strftime("%Y-%m-%d")
-        end = (date_obj).strftime("%Y-%m-%d")
-        data = stock.history(start=start, end=end)
-        if not data.empty:
-            return round(data['Close'].iloc[-1], 2)
-        else:
-            # fallback: fetch last available close before date
-            data = stock.history(end=start, period="60d")
-            if not data.empty:
-                # Get last closing price before or on the date
-                filtered = data[data.index.date <= date_obj]
-                if not filtered.empty:
-                    return round(filtered['Close'].iloc[-1], 2)
-        return 0.0
-    except Exception as e:
-        print(f"Error fetching price for {ticker} on {date_str}: {e}")
-        return 0.0
+    except (ValueError, TypeError) as e:
+        logger.warning("Invalid purchase date %r for %s: %s", date_str, ticker, e)
+        return None
+
+    def fetch():
+        # A week back covers weekends and holidays; `end` is exclusive
+        start = (date_obj - timedelta(days=7)).strftime("%Y-%m-%d")
+        end = (date_obj + timedelta(days=1)).strftime("%Y-%m-%d")
+        try:
+            result = yahoo.history(ticker, start=start, end=end)
+        except UpstreamUnavailable as e:
+            logger.warning("Error fetching price for %s on %s: %s", ticker, date_str, e)
+            return None, True
+        filtered = result.data[result.data.index.date <= date_obj]
+        price = round(float(filtered['Close'].iloc[-1]), 2) if not filtered.empty else None
+        return price, result.stale
+
+    price, _ = price_on_date_cache.get_or_compute(
+        (ticker.upper(), date_obj.isoformat()), fetch, cache_if=lambda r: r[0] is not None and not r[1]
+    )
+    return price
 
 
 def get_stock_history(ticker, range="1m"):
-    stock = yf.Ticker(ticker)
     periods = {
         "5d": "5d",
         "1m": "1mo",
@@ -53,5 +77,19 @@ def get_stock_history(ticker, range="1m"):
         "1y": "1y",
         "max": "max"
     }
-    data = stock.history(period=periods.get(range, "1mo"))
-    return [{"date": str(idx.date()), "close": round(row["Close"],2)} for idx, row in data.iterrows()]
+    period = periods.get(range, "1mo")
+
+    def fetch():
+        try:
+            result = yahoo.history(ticker, period=period)
+        except UpstreamUnavailable as e:
+            logger.warning("Error fetching %s history for %s: %s", range, ticker, e)
+            return [], True
+        points = [{"date": str(idx.date()), "close": round(float(close), 2)}
+                  for idx, close in result.data["Close"].items()]
+        return points, result.stale
+
+    points, _ = history_cache.get_or_compute(
+        (ticker.upper(), period), fetch, cache_if=lambda r: bool(r[0]) and not r[1]
+    )
+    return points
@@ -0,0 +1,75 @@
+# app/utils/adaptiveSampling.py
+"""
+Running mean and confidence interval for a random sample drawn without
+replacement from a finite set (an influencer's tweets), so scoring can stop
+once the estimate is tight enough instead of covering every item.
+"""
+import math
+from statistics import NormalDist
+import numpy as np
+
+
+def z_value(confidence: float) -> float:
+    """Two-sided normal quantile, e.g. 1.96 for 0.95."""
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+class SampledMean:
+    """Mean of `population` scores estimated from a uniformly shuffled prefix of them."""
+
+    def __init__(self, population: int, rng: np.random.Generator):
+        self.population = population
+        self.order = rng.permutation(population)
+        self.n = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    @classmethod
+    def exact(cls, value: float, population: int) -> "SampledMean":
+        """A mean that is already known (e.g. cached), with zero variance."""
+        known = cls(0, np.random.default_rng(0))
+        known.population = known.n = population
+        known._sum = value * population
+        known._sum_sq = value * value * population
+        return known
+
+    @property
+    def done(self) -> bool:
+        return self.n >= self.population
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self.n if self.n else math.nan
+
+    def next_indices(self, size: int) -> np.ndarray:
+        """Indices of the next `size` items to score; pass their scores to add()."""
+        return self.order[self.n:self.n + size]
+
+    def add(self, scores):
+        scores = np.asarray(scores, dtype=float)
+        self.n += len(scores)
+        self._sum += float(scores.sum())
+        self._sum_sq += float((scores * scores).sum())
+
+    def variance(self) -> float:
+        """Variance of the mean with the finite-population correction; inf below two samples."""
+        if self.done:
+            return 0.0
+        if self.n < 2:
+            return math.inf
+        sample_var = max(0.0, (self._sum_sq - self._sum ** 2 / self.n) / (self.n - 1))
+        return sample_var / self.n * (1 - self.n / self.population)
+
+
+def weighted_interval(samples, weights, z: float):
+    """
+    (mean, half-width) of sum(w * sample mean), weights normalized to sum to 1.
+    Samples are independent, so the variances add up; zero-weight samples are
+    ignored (they may not have been drawn at all).
+    """
+    weights = np.asarray(weights, dtype=float)
+    weights = weights / weights.sum()
+    pairs = [(w, s) for w, s in zip(weights, samples) if w]
+    mean = float(sum(w * s.mean for w, s in pairs))
+    variance = sum(w * w * s.variance() for w, s in pairs)
+    return mean, z * math.sqrt(variance)
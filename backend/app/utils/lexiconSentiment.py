@@ -0,0 +1,60 @@
+# app/utils/lexiconSentiment.py
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from textblob.en import sentiment as pattern_sentiment
+
+# Kept free of FinBERT / MongoDB imports so process-pool workers stay light.
+vader = SentimentIntensityAnalyzer()
+
+# Below this many texts a process pool costs more than it saves.
+SHARD_THRESHOLD = 20_000
+SHARD_SIZE = 5_000
+
+_executor = None
+
+
+def _get_executor(processes: int) -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn, not fork: the parent may already hold torch / event-loop threads
+        _executor = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def _score_chunk(texts):
+    """Raw VADER compound and TextBlob (pattern) polarity for a list of texts."""
+    polarity_scores = vader.polarity_scores
+    v = np.fromiter((polarity_scores(x)["compound"] for x in texts), dtype=np.float64, count=len(texts))
+    # Same lexicon TextBlob(text).sentiment uses, without building a TextBlob per text
+    t = np.fromiter((pattern_sentiment(x)[0] for x in texts), dtype=np.float64, count=len(texts))
+    return v, t
+
+
+def lexicon_scores(texts, processes: int = None):
+    """
+    Score a batch of texts with VADER and TextBlob in one call.
+    Returns two arrays (vader, textblob) normalized to [0, 1], matching
+    normalize_score() applied to the per-tweet values.
+    Batches larger than SHARD_THRESHOLD are split across a process pool.
+    """
+    texts = list(texts)
+    if not texts:
+        empty = np.empty(0, dtype=np.float64)
+        return empty, empty
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    if processes > 1 and len(texts) >= SHARD_THRESHOLD:
+        chunks = [texts[i:i + SHARD_SIZE] for i in range(0, len(texts), SHARD_SIZE)]
+        results = list(_get_executor(processes).map(_score_chunk, chunks))
+        v = np.concatenate([r[0] for r in results])
+        t = np.concatenate([r[1] for r in results])
+    else:
+        v, t = _score_chunk(texts)
+
+    # [-1, 1] -> [0, 1]
+    return (v + 1.0) / 2.0, (t + 1.0) / 2.0
@@ -1,23 +1,34 @@
+import logging
 from langchain_google_genai import ChatGoogleGenerativeAI
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 API_KEY = settings.GEMINI_API_KEY
 
 if not API_KEY:
     raise ValueError("Set GEMINI_API_KEY in your .env file")
 
 
+# One client per temperature; each keeps its own HTTP connection pool alive
+_clients = {}
+
+
 async def llm_model(temp: float = 0.1):
     """
-    Returns a ChatGoogleGenerativeAI instance asynchronously.
+    Returns a shared ChatGoogleGenerativeAI instance asynchronously.
     """
+    llm = _clients.get(temp)
+    if llm is not None:
+        return llm
     try:
         llm = ChatGoogleGenerativeAI(
             model="gemini-2.0-flash-lite",
             google_api_key=API_KEY,
             temperature=temp,
         )
-        return llm
     except Exception as e:
-        print("Error creating LLM model:", e)
+        logger.error("Error creating LLM model: %s", e)
         raise e
+    _clients[temp] = llm
+    return llm
@@ -0,0 +1,109 @@
+# app/utils/metrics.py
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+# Stages: download, fit, predict, merge, db_fetch, finbert_batch, llm_call, llm_first_token, pdf_build, revalue_batch
+STAGE_SECONDS = Histogram(
+    "fintweet_stage_seconds",
+    "Wall time spent in each pipeline stage",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+CACHE_REQUESTS = Counter(
+    "fintweet_cache_requests_total",
+    "Cache lookups by cache name and result (hit / miss)",
+    ["cache", "result"],
+)
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "fintweet_executor_queue_depth",
+    "Jobs submitted to an executor that have not finished yet",
+    ["executor"],
+    multiprocess_mode="livesum",
+)
+UPSTREAM_ERRORS = Counter(
+    "fintweet_upstream_errors_total",
+    "Failed calls to external services",
+    ["upstream"],
+)
+
+TWEETS_DEDUPLICATED = Counter(
+    "fintweet_tweets_deduplicated_total",
+    "Tweets not scored because a near-duplicate in the same set was",
+)
+PRICE_STREAM_CLIENTS = Gauge(
+    "fintweet_price_stream_clients",
+    "WebSocket clients connected to /ws/prices",
+    multiprocess_mode="livesum",
+)
+PRICE_STREAM_POLLERS = Gauge(
+    "fintweet_price_stream_pollers",
+    "Tickers with a live upstream poller",
+    multiprocess_mode="livesum",
+)
+PRICE_STREAM_COALESCED = Counter(
+    "fintweet_price_stream_coalesced_total",
+    "Quotes replaced by a newer one before a slow client received them",
+)
+
+
+@contextmanager
+def stage(name: str, **context):
+    """Time a block into STAGE_SECONDS{stage=name} and log it at DEBUG."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(name).observe(elapsed)
+        logger.debug("stage=%s elapsed=%.4fs %s", name, elapsed, context or "")
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_upstream_error(upstream: str):
+    UPSTREAM_ERRORS.labels(upstream).inc()
+
+
+async def run_in_thread(executor: str, fn, *args, **kwargs):
+    """asyncio.to_thread() that keeps EXECUTOR_QUEUE_DEPTH{executor} up to date."""
+    gauge = EXECUTOR_QUEUE_DEPTH.labels(executor)
+    gauge.inc()
+    try:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    finally:
+        gauge.dec()
+
+
+async def run_in_pool(executor: str, pool, fn, *args):
+    """Like run_in_thread(), but on a dedicated (bounded) executor."""
+    gauge = EXECUTOR_QUEUE_DEPTH.labels(executor)
+    gauge.inc()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    finally:
+        gauge.dec()
+
+
+def render_metrics():
+    """Exposition payload; aggregates all workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,79 @@
+# app/utils/modelLoader.py
+"""
+Load Hugging Face classifiers so their weights are shared between processes.
+
+The first process exports the model once to MODEL_CACHE_DIR (config,
+tokenizer and a flat tensor file). Every process then builds the module on
+the meta device and points its parameters straight into the memory-mapped
+safetensors file, so all uvicorn workers read the same page-cache pages instead of each
+holding a private ~440 MB copy. Inference never writes to the weights, so
+the pages stay shared (and the same holds for a model loaded before a fork).
+"""
+import logging
+import os
+from itertools import chain
+from pathlib import Path
+import torch
+from safetensors.torch import load_file, save_file
+from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+WEIGHTS_FILE = "weights.safetensors"
+
+
+def _export(name: str, target: Path):
+    """Save config, tokenizer and every tensor (including non-persistent buffers) to target."""
+    model = AutoModelForSequenceClassification.from_pretrained(name)
+    tensors = {k: t.detach().contiguous() for k, t in chain(model.named_parameters(), model.named_buffers())}
+    target.mkdir(parents=True, exist_ok=True)
+    model.config.save_pretrained(target)
+    AutoTokenizer.from_pretrained(name).save_pretrained(target)
+    # Several workers may export at once; whoever renames last wins, each file is complete
+    tmp = target / f"{WEIGHTS_FILE}.{os.getpid()}.tmp"
+    save_file(tensors, tmp)
+    os.replace(tmp, target / WEIGHTS_FILE)
+    logger.info("Exported %s to %s", name, target)
+
+
+def _assign(model, tensors: dict):
+    for name, tensor in tensors.items():
+        module_name, _, attr = name.rpartition(".")
+        module = model.get_submodule(module_name)
+        if attr in module._parameters:
+            module._parameters[attr] = torch.nn.Parameter(tensor, requires_grad=False)
+        else:
+            module._buffers[attr] = tensor
+
+
+def _load_mapped(name: str, cache_dir: Path):
+    target = cache_dir / name.replace("/", "--")
+    if not (target / WEIGHTS_FILE).exists():
+        _export(name, target)
+
+    tokenizer = AutoTokenizer.from_pretrained(target)
+    config = AutoConfig.from_pretrained(target)
+    with torch.device("meta"):
+        model = AutoModelForSequenceClassification.from_config(config)
+    # safetensors maps the file read-only, so pages stay clean and shareable
+    # (torch.load(mmap=True) maps it copy-on-write and dirties every page it reads)
+    _assign(model, load_file(target / WEIGHTS_FILE))
+    if any(t.is_meta for t in chain(model.parameters(), model.buffers())):
+        raise RuntimeError(f"{WEIGHTS_FILE} in {target} doesn't cover every tensor of {name}")
+    return tokenizer, model
+
+
+def load_sequence_classifier(name: str):
+    """(tokenizer, model in eval mode), memory-mapped unless MODEL_MMAP is off."""
+    if settings.MODEL_MMAP:
+        try:
+            tokenizer, model = _load_mapped(name, Path(settings.MODEL_CACHE_DIR))
+            model.eval()
+            return tokenizer, model
+        except Exception as e:
+            logger.warning("Memory-mapped load of %s failed (%s); loading a private copy", name, e)
+    tokenizer = AutoTokenizer.from_pretrained(name)
+    model = AutoModelForSequenceClassification.from_pretrained(name)
+    model.eval()
+    return tokenizer, model
@@ -0,0 +1,535 @@
+# app/utils/sharedCache.py
+"""
+Two-level cache shared by every uvicorn worker on a host: an in-process LRU
+(TTLCache) in front of a shared tier (SQLite file, Redis, or an in-memory
+stand-in). Values cross the shared tier as msgpack, with NumPy arrays and
+DataFrames stored column by column as raw buffers instead of pickles.
+
+A miss takes a short lease in the shared tier, so only one worker (and one
+thread / task within it) computes a given key; the rest wait for the result.
+Leases carry a random token and are only released by their holder. The
+async methods do tier I/O in a worker thread, never on the event loop.
+"""
+import asyncio
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+import msgpack
+import numpy as np
+import pandas as pd
+from app.config import settings
+from app.utils.cache import TTLCache
+from app.utils.metrics import record_cache, run_in_thread
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 30.0  # longest a computation may hold a key before others give up waiting
+LEASE_POLL = 0.05
+
+_MISSING = object()
+
+# ---------------------------
+# Serialization
+# ---------------------------
+_EXT_NDARRAY = 1
+_EXT_FRAME = 2
+_EXT_TIMESTAMP = 3
+_EXT_TUPLE = 4
+
+
+def _array_payload(arr: np.ndarray) -> list:
+    arr = np.ascontiguousarray(arr)
+    if arr.dtype.hasobject:
+        return ["o", list(arr.tolist())]
+    return [arr.dtype.str, list(arr.shape), arr.tobytes()]
+
+
+def _array_from(payload) -> np.ndarray:
+    if payload[0] == "o":
+        return np.array(payload[1], dtype=object)
+    dtype, shape, buf = payload
+    return np.frombuffer(buf, dtype=dtype).reshape(shape).copy()
+
+
+def _index_payload(index: pd.Index) -> list:
+    if isinstance(index, pd.RangeIndex):
+        return [index.name, "range", [index.start, index.stop, index.step]]
+    tz = str(index.tz) if isinstance(index, pd.DatetimeIndex) and index.tz is not None else None
+    values = index.tz_localize(None).values if tz else index.values
+    return [index.name, tz, _array_payload(values)]
+
+
+def _index_from(payload) -> pd.Index:
+    name, tz, values = payload
+    if tz == "range":
+        return pd.RangeIndex(*values, name=name)
+    index = pd.Index(_array_from(values), name=name)
+    return index.tz_localize(tz) if tz else index
+
+
+def _default(obj):
+    if isinstance(obj, pd.DataFrame):
+        columns = [list(c) if isinstance(c, tuple) else c for c in obj.columns]
+        payload = [
+            columns,
+            isinstance(obj.columns, pd.MultiIndex),
+            list(obj.columns.names),
+            _index_payload(obj.index),
+            [_array_payload(obj[c].to_numpy()) for c in obj.columns],
+        ]
+        return msgpack.ExtType(_EXT_FRAME, packb(payload))
+    if isinstance(obj, np.ndarray):
+        return msgpack.ExtType(_EXT_NDARRAY, packb(_array_payload(obj)))
+    if isinstance(obj, pd.Timestamp):
+        return msgpack.ExtType(_EXT_TIMESTAMP, packb([obj.value, str(obj.tz) if obj.tz else None]))
+    if isinstance(obj, tuple):
+        return msgpack.ExtType(_EXT_TUPLE, packb(list(obj)))
+    if isinstance(obj, np.generic):
+        return obj.item()
+    # strict_types sends subclasses of builtins here too
+    for base in (dict, list, str, bytes, int, float):
+        if isinstance(obj, base):
+            return base(obj)
+    raise TypeError(f"Cannot cache object of type {type(obj).__name__}")
+
+
+def _ext_hook(code, data):
+    payload = unpackb(data)
+    if code == _EXT_NDARRAY:
+        return _array_from(payload)
+    if code == _EXT_FRAME:
+        columns, multi, names, index, arrays = payload
+        if multi:
+            columns = pd.MultiIndex.from_tuples([tuple(c) for c in columns], names=names)
+        frame = pd.DataFrame(dict(enumerate(map(_array_from, arrays))), index=_index_from(index), copy=False)
+        frame.columns = columns if multi else pd.Index(columns, name=names[0])
+        return frame
+    if code == _EXT_TIMESTAMP:
+        return pd.Timestamp(payload[0], tz=payload[1])
+    if code == _EXT_TUPLE:
+        return tuple(payload)
+    return msgpack.ExtType(code, data)
+
+
+def packb(value) -> bytes:
+    """msgpack with NumPy / pandas support; tuples round-trip as tuples."""
+    return msgpack.packb(value, default=_default, use_bin_type=True, strict_types=True)
+
+
+def unpackb(data: bytes):
+    return msgpack.unpackb(data, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+
+
+# ---------------------------
+# Shared tiers
+# ---------------------------
+class MemoryTier:
+    """In-process stand-in for the shared tier (tests, benchmarks, single-worker runs)."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = {}  # key -> (value, expires); dict order doubles as LRU order
+        self._leases = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                self._size -= len(entry[0])
+                return None
+            self._entries[key] = entry
+            return entry
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[0])
+            self._entries[key] = (value, time.time() + ttl)
+            self._size += len(value)
+            while self._size > self.max_bytes and self._entries:
+                evicted, _ = self._entries.pop(next(iter(self._entries)))
+                self._size -= len(evicted)
+
+    def delete(self, key: str):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[0])
+
+    def acquire(self, key: str, seconds: float):
+        """A token for release() if the lease was free, else None."""
+        with self._lock:
+            now = time.time()
+            held = self._leases.get(key)
+            if held is not None and held[1] > now:
+                return None
+            token = secrets.token_hex(8)
+            self._leases[key] = (token, now + seconds)
+            return token
+
+    def release(self, key: str, token: str):
+        with self._lock:
+            held = self._leases.get(key)
+            if held is not None and held[0] == token:
+                del self._leases[key]
+
+
+class SQLiteTier:
+    """
+    One SQLite file (WAL mode) shared by all workers on the host. Least
+    recently used entries are evicted once the stored values pass max_bytes;
+    triggers keep the running total in `stats`, so a write never sums the table.
+    """
+
+    # Reads only bump `accessed` this often, so hot keys don't turn every hit into a write
+    TOUCH_INTERVAL = 60.0
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("BEGIN IMMEDIATE")  # one process creates the schema and seeds the total
+            try:
+                self._create_schema(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @staticmethod
+    def _create_schema(conn):
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "expires REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires)")
+        conn.execute("CREATE TABLE IF NOT EXISTS stats (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO stats (id, total) SELECT 0, COALESCE(SUM(size), 0) FROM entries")
+        conn.execute("CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries "
+                     "BEGIN UPDATE stats SET total = total + NEW.size WHERE id = 0; END")
+        conn.execute("CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries "
+                     "BEGIN UPDATE stats SET total = total - OLD.size WHERE id = 0; END")
+        conn.execute("CREATE TRIGGER IF NOT EXISTS entries_resize AFTER UPDATE OF size ON entries "
+                     "BEGIN UPDATE stats SET total = total + NEW.size - OLD.size WHERE id = 0; END")
+        # Leases used to have no owner token; they only live for seconds, so just recreate the table
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(leases)")]
+        if columns and "token" not in columns:
+            conn.execute("DROP TABLE leases")
+        conn.execute("CREATE TABLE IF NOT EXISTS leases "
+                     "(key TEXT PRIMARY KEY, token TEXT NOT NULL, expires REAL NOT NULL)")
+
+    def get(self, key: str):
+        conn = self._conn()
+        row = conn.execute("SELECT value, expires, accessed FROM entries WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or row[1] <= now:
+            return None
+        if now - row[2] > self.TOUCH_INTERVAL:
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return row[0], row[1]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        conn = self._conn()
+        now = time.time()
+        # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete doesn't fire triggers
+        conn.execute(
+            "INSERT INTO entries (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+            "expires = excluded.expires, accessed = excluded.accessed",
+            (key, value, len(value), now + ttl, now),
+        )
+        self._evict(conn, now)
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def _total(self, conn) -> int:
+        return conn.execute("SELECT total FROM stats WHERE id = 0").fetchone()[0]
+
+    def _evict(self, conn, now: float):
+        if self._total(conn) <= self.max_bytes:
+            return
+        conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+        total = self._total(conn)
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we're back under budget
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            victims.append((key,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def acquire(self, key: str, seconds: float):
+        conn = self._conn()
+        now = time.time()
+        token = secrets.token_hex(8)
+        conn.execute("DELETE FROM leases WHERE key = ? AND expires <= ?", (key, now))
+        inserted = conn.execute("INSERT OR IGNORE INTO leases (key, token, expires) VALUES (?, ?, ?)",
+                                (key, token, now + seconds)).rowcount == 1
+        return token if inserted else None
+
+    def release(self, key: str, token: str):
+        self._conn().execute("DELETE FROM leases WHERE key = ? AND token = ?", (key, token))
+
+
+class RedisTier:
+    """
+    Any Redis-protocol server. Size-bounded eviction is the server's job:
+    run it with maxmemory and maxmemory-policy allkeys-lru.
+    """
+
+    def __init__(self, url: str, prefix: str = "fintweet:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis needs the 'redis' package") from e
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+        # Delete the lease only if it still holds our token (it may have expired and been retaken)
+        self._release_script = self._redis.register_script(
+            "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+        )
+
+    def get(self, key: str):
+        pipe = self._redis.pipeline()
+        pipe.get(self.prefix + key)
+        pipe.pttl(self.prefix + key)
+        value, pttl = pipe.execute()
+        if value is None or pttl < 0:
+            return None
+        return value, time.time() + pttl / 1000
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self._redis.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+
+    def delete(self, key: str):
+        self._redis.delete(self.prefix + key)
+
+    def acquire(self, key: str, seconds: float):
+        token = secrets.token_hex(8)
+        if self._redis.set(self.prefix + "lease:" + key, token, nx=True, px=int(seconds * 1000)):
+            return token
+        return None
+
+    def release(self, key: str, token: str):
+        self._release_script(keys=[self.prefix + "lease:" + key], args=[token])
+
+
+def make_tier(backend: str):
+    if backend == "sqlite":
+        return SQLiteTier(settings.CACHE_PATH, settings.CACHE_MAX_BYTES)
+    if backend == "redis":
+        return RedisTier(settings.CACHE_URL)
+    if backend == "memory":
+        return MemoryTier(settings.CACHE_MAX_BYTES)
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown CACHE_BACKEND {backend!r}")
+
+
+# ---------------------------
+# Two-level cache
+# ---------------------------
+class SharedCache:
+    """
+    get_or_compute() / aget_or_compute(): local LRU, then the shared tier,
+    then compute once per key across all workers. A tier of None disables
+    caching entirely (every call computes).
+    """
+
+    def __init__(self, name: str, tier, ttl: float, local_items: int = 256):
+        self.name = name
+        self.tier = tier
+        self.ttl = ttl
+        self._local = TTLCache(name, ttl=ttl, maxsize=local_items)
+        self._key_locks = {}
+        self._key_locks_guard = threading.Lock()
+        self._async_locks = {}
+
+    def _shared_key(self, key) -> str:
+        return f"{self.name}:{key}"
+
+    def _lookup(self, key):
+        """Local, then shared; returns (found, value)."""
+        value = self._local.get(key, _MISSING)
+        if value is not _MISSING:
+            return True, value
+        try:
+            entry = self.tier.get(self._shared_key(key))
+        except Exception as e:
+            logger.warning("Shared cache read failed for %s: %s", self.name, e)
+            entry = None
+        record_cache(f"{self.name}_shared", entry is not None)
+        if entry is None:
+            return False, None
+        data, expires = entry
+        value = unpackb(data)
+        self._local.set(key, value, ttl=expires - time.time())
+        return True, value
+
+    async def _alookup(self, key):
+        value = self._local.get(key, _MISSING)
+        if value is not _MISSING:
+            return True, value
+        return await run_in_thread("cache", self._lookup, key)
+
+    def _store(self, key, value, ttl: float):
+        self._local.set(key, value, ttl=ttl)
+        try:
+            self.tier.set(self._shared_key(key), packb(value), ttl)
+        except Exception as e:
+            logger.warning("Shared cache write failed for %s: %s", self.name, e)
+
+    def _acquire(self, key):
+        """(go ahead, lease token); a broken tier means computing without a lease."""
+        try:
+            token = self.tier.acquire(self._shared_key(key), LEASE_SECONDS)
+            return token is not None, token
+        except Exception as e:
+            logger.warning("Shared cache lease failed for %s: %s", self.name, e)
+            return True, None
+
+    def _release(self, key, token):
+        if token is None:  # never held one (tier error or gave up waiting)
+            return
+        try:
+            self.tier.release(self._shared_key(key), token)
+        except Exception as e:
+            logger.warning("Shared cache lease release failed for %s: %s", self.name, e)
+
+    @contextmanager
+    def _key_lock(self, key):
+        with self._key_locks_guard:
+            lock, users = self._key_locks.get(key, (None, 0))
+            lock = lock or threading.Lock()
+            self._key_locks[key] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._key_locks_guard:
+                lock, users = self._key_locks[key]
+                if users == 1:
+                    del self._key_locks[key]
+                else:
+                    self._key_locks[key] = (lock, users - 1)
+
+    @asynccontextmanager
+    async def _async_key_lock(self, key):
+        # Counted like _key_lock: the lock is dropped once nobody holds or awaits it
+        lock, users = self._async_locks.get(key, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._async_locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._async_locks[key]
+            if users == 1:
+                del self._async_locks[key]
+            else:
+                self._async_locks[key] = (lock, users - 1)
+
+    async def ainvalidate(self, key):
+        """Drop a key here and in the shared tier (other workers' local copies expire on their own)."""
+        self._local.invalidate(key)
+        if self.tier is None:
+            return
+        try:
+            await run_in_thread("cache", self.tier.delete, self._shared_key(key))
+        except Exception as e:
+            logger.warning("Shared cache delete failed for %s: %s", self.name, e)
+
+    async def aget(self, key, default=None):
+        """Cached value (local, then shared) without computing it on a miss."""
+        if self.tier is None:
+            return default
+        found, value = await self._alookup(key)
+        return value if found else default
+
+    def get_or_compute(self, key, compute, ttl: float = None, cache_if=None):
+        """
+        Blocking version for code that runs in worker threads. Results for
+        which cache_if(result) is false are returned but not stored.
+        """
+        if self.tier is None:
+            return compute()
+        ttl = self.ttl if ttl is None else ttl
+        found, value = self._lookup(key)
+        if found:
+            return value
+        with self._key_lock(key):
+            found, value = self._lookup(key)
+            if found:
+                return value
+            deadline = time.monotonic() + LEASE_SECONDS
+            acquired, token = self._acquire(key)
+            while not acquired and time.monotonic() < deadline:
+                time.sleep(LEASE_POLL)
+                found, value = self._lookup(key)
+                if found:
+                    return value
+                acquired, token = self._acquire(key)
+            try:
+                value = compute()
+                if cache_if is None or cache_if(value):
+                    self._store(key, value, ttl)
+                return value
+            finally:
+                self._release(key, token)
+
+    async def aget_or_compute(self, key, compute, ttl: float = None, cache_if=None):
+        """Async version; `compute` is a coroutine function."""
+        if self.tier is None:
+            return await compute()
+        ttl = self.ttl if ttl is None else ttl
+        found, value = await self._alookup(key)
+        if found:
+            return value
+        async with self._async_key_lock(key):
+            found, value = await self._alookup(key)
+            if found:
+                return value
+            deadline = time.monotonic() + LEASE_SECONDS
+            acquired, token = await run_in_thread("cache", self._acquire, key)
+            while not acquired and time.monotonic() < deadline:
+                await asyncio.sleep(LEASE_POLL)
+                found, value = await self._alookup(key)
+                if found:
+                    return value
+                acquired, token = await run_in_thread("cache", self._acquire, key)
+            try:
+                value = await compute()
+                if cache_if is None or cache_if(value):
+                    await run_in_thread("cache", self._store, key, value, ttl)
+                return value
+            finally:
+                await run_in_thread("cache", self._release, key, token)
+
+
+shared_tier = make_tier(settings.CACHE_BACKEND)
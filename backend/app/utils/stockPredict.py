@@ -1,28 +1,74 @@
 # app/utils/stockPredict.py
 import asyncio
-import yfinance as yf
+import logging
 import pandas as pd
 from prophet import Prophet
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import numpy as np
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
+from app.config import settings
+from app.services.yahoo_client import yahoo
+from app.utils.metrics import run_in_thread, stage
+from app.utils.sharedCache import SharedCache, shared_tier
+
+logger = logging.getLogger(__name__)
+
+# (ticker, max horizon, day) -> (fit summary with the merged frame under "data", built from stale data?)
+# One fit per ticker per day covers every horizon up to FORECAST_MAX_HORIZON
+forecast_cache = SharedCache("forecast", shared_tier, ttl=settings.FORECAST_CACHE_TTL, local_items=64)
+
+# Horizons (days) summarised alongside the requested one, for switching in the UI
+FORECAST_HORIZONS = (7, 30, 60, 90, 180, 365)
+
+
+def directional_score(pct_change):
+    """Logistic squash of a % change into (0, 1); works on scalars and arrays."""
+    return 1 / (1 + np.exp(-np.asarray(pct_change, dtype=float) / 4.0))
+
+
+def horizon_summary(fit: dict, horizons) -> list:
+    """predicted_price / pct_change / directional_score for each horizon, in one vectorized pass."""
+    future = fit["data"]["predicted"].to_numpy()[fit["history_rows"]:]
+    days = np.asarray(horizons, dtype=int)
+    predicted = future[days - 1]
+    last_price = fit["last_price"]
+    pct = (predicted - last_price) / last_price * 100 if last_price != 0 else np.zeros(len(days))
+    scores = directional_score(pct)
+    return [
+        {
+            "days": int(d),
+            "predicted_price": round(float(p), 2),
+            "pct_change": round(float(c), 4),
+            "directional_score": round(float(s), 6),
+        }
+        for d, p, c, s in zip(days, predicted, pct, scores)
+    ]
+
 
 async def predict_stock(ticker: str, future_days: int = 90, plot: bool = False):
     """
     Asynchronously predicts future stock prices using Prophet and returns combined (historical + forecast) data.
+    The model is fit once per ticker per day up to FORECAST_MAX_HORIZON; future_days only slices that forecast.
     Handles NaN values for safe JSON serialization.
     """
     ticker = ticker.strip().upper()
+    max_days = settings.FORECAST_MAX_HORIZON
+    if not 1 <= future_days <= max_days:
+        raise ValueError(f"future_days must be between 1 and {max_days}")
     end_date = datetime.today().strftime("%Y-%m-%d")
     start_date = (datetime.today() - timedelta(days=5 * 365)).strftime("%Y-%m-%d")
 
-    print(f"\n📥 Downloading {ticker} data from {start_date} to {end_date}...")
+    logger.info("Downloading %s data from %s to %s", ticker, start_date, end_date)
 
     # Run blocking yfinance and Prophet code in a background thread
     def _run_forecast():
-        data = yf.download(ticker, start=start_date, end=end_date)
-        print(f"✅ Data downloaded! {len(data)} rows")
+        with stage("download", ticker=ticker):
+            download = yahoo.download(ticker, start=start_date, end=end_date)
+        data = download.data
+        if download.stale:
+            logger.warning("Forecasting %s from stale price history", ticker)
+        logger.debug("Downloaded %d rows for %s", len(data), ticker)
 
         if isinstance(data.columns, pd.MultiIndex):
             data.columns = [f"{col[0]}_{col[1]}" for col in data.columns.values]
@@ -34,28 +80,31 @@ async def predict_stock(ticker: str, future_days: int = 90, plot: bool = False):
         df['y'] = pd.to_numeric(df['y'], errors='coerce')
 
         # Train Prophet
-        model = Prophet(daily_seasonality=True, yearly_seasonality=True, weekly_seasonality=True)
-        model.fit(df)
+        with stage("fit", ticker=ticker):
+            model = Prophet(daily_seasonality=True, yearly_seasonality=True, weekly_seasonality=True)
+            model.fit(df)
 
-        # Forecast
-        future = model.make_future_dataframe(periods=future_days)
-        forecast = model.predict(future)
+        # Forecast to the longest horizon; shorter ones are prefixes of it
+        with stage("predict", ticker=ticker):
+            future = model.make_future_dataframe(periods=max_days)
+            forecast = model.predict(future)
 
         # Merge
-        merged = pd.merge(
-            forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']],
-            df,
-            on='ds',
-            how='left'
-        ).rename(columns={
-            'y': 'actual',
-            'yhat': 'predicted',
-            'yhat_lower': 'lower',
-            'yhat_upper': 'upper'
-        })
-
-        # Fill NaN values to prevent JSON serialization errors
-        merged = merged.fillna(0)
+        with stage("merge", ticker=ticker):
+            merged = pd.merge(
+                forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']],
+                df,
+                on='ds',
+                how='left'
+            ).rename(columns={
+                'y': 'actual',
+                'yhat': 'predicted',
+                'yhat_lower': 'lower',
+                'yhat_upper': 'upper'
+            })
+
+            # Fill NaN values to prevent JSON serialization errors
+            merged = merged.fillna(0)
 
         hist = merged[merged['actual'] != 0]
         mae = mean_absolute_error(hist['actual'], hist['predicted']) if len(hist) > 0 else 0
@@ -63,16 +112,26 @@ async def predict_stock(ticker: str, future_days: int = 90, plot: bool = False):
         mape = np.mean(np.abs((hist['actual'] - hist['predicted']) / hist['actual'])) * 100 if len(hist) > 0 else 0
 
         last_price = hist['actual'].iloc[-1] if len(hist) > 0 else 0
-        predicted_price = merged['predicted'].iloc[-1] if len(merged) > 0 else 0
-        pct_change = (predicted_price - last_price) / last_price * 100 if last_price != 0 else 0
 
-        score = round(float(1 / (1 + np.exp(-pct_change / 4.0))), 6)
+        fit = {
+            "ticker": ticker,
+            "last_price": float(last_price),
+            "metrics": {
+                "MAE": round(float(mae), 4),
+                "RMSE": round(float(rmse), 4),
+                "MAPE": round(float(mape), 4),
+            },
+            # Rows up to the last trading day; the max_days forecast rows follow
+            "history_rows": int((merged['ds'] <= df['ds'].max()).sum()),
+            "data": merged,
+        }
 
         if plot:
+            shown = merged.iloc[:fit["history_rows"] + future_days]
             plt.figure(figsize=(14, 7))
-            plt.plot(merged['ds'], merged['actual'], label='Actual', color='blue')
-            plt.plot(merged['ds'], merged['predicted'], label='Predicted', color='orange')
-            plt.fill_between(merged['ds'], merged['lower'], merged['upper'], color='orange', alpha=0.2)
+            plt.plot(shown['ds'], shown['actual'], label='Actual', color='blue')
+            plt.plot(shown['ds'], shown['predicted'], label='Predicted', color='orange')
+            plt.fill_between(shown['ds'], shown['lower'], shown['upper'], color='orange', alpha=0.2)
             plt.title(f"{ticker} Stock Price Forecast ({future_days} days ahead)")
             plt.xlabel("Date")
             plt.ylabel("Price")
@@ -82,35 +141,44 @@ async def predict_stock(ticker: str, future_days: int = 90, plot: bool = False):
             model.plot_components(forecast)
             plt.show()
 
-        result = {
-            "ticker": ticker,
-            "last_price": round(float(last_price), 2),
-            "predicted_price": round(float(predicted_price), 2),
-            "pct_change": round(float(pct_change), 4),
-            "directional_score": score,
-            "metrics": {
-                "MAE": round(float(mae), 4),
-                "RMSE": round(float(rmse), 4),
-                "MAPE": round(float(mape), 4),
-            },
-            "data": merged.to_dict(orient="records")  # safe for JSON
-        }
-
-        return result
-
-    return await asyncio.to_thread(_run_forecast)
+        return fit, download.stale
+
+    async def compute():
+        return await run_in_thread("forecast", _run_forecast)
+
+    if plot:
+        fit, _ = await compute()
+    else:
+        fit, _ = await forecast_cache.aget_or_compute((ticker, max_days, end_date), compute, cache_if=lambda r: not r[1])
+
+    horizons = sorted({h for h in FORECAST_HORIZONS if h <= max_days} | {future_days})
+    summaries = horizon_summary(fit, horizons)
+    requested = next(s for s in summaries if s["days"] == future_days)
+    data = fit["data"].iloc[:fit["history_rows"] + future_days]
+    return {
+        "ticker": ticker,
+        "future_days": future_days,
+        "last_price": round(fit["last_price"], 2),
+        "predicted_price": requested["predicted_price"],
+        "pct_change": requested["pct_change"],
+        "directional_score": requested["directional_score"],
+        "metrics": fit["metrics"],
+        "horizons": summaries,
+        # Records are built per call so callers can't mutate the cached frame
+        "data": data.to_dict(orient="records"),  # safe for JSON
+    }
 
 
 # === Example Usage ===
 async def main():
     result = await predict_stock("AAPL", future_days=90, plot=True)
-    print("\n📊 Summary:")
-    print(f"Directional Score: {result['directional_score']}")
-    print(f"Change %: {result['pct_change']:.3f}%")
-    print(f"MAE: {result['metrics']['MAE']}")
-    print("\n=== Combined Data (Last 10 Rows) ===")
-    print(result['data'][-10:])
+    logger.info(
+        "📊 AAPL: directional score %s, change %.3f%%, MAE %s",
+        result["directional_score"], result["pct_change"], result["metrics"]["MAE"],
+    )
+    logger.info("Last 10 rows: %s", result["data"][-10:])
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=settings.LOG_LEVEL.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     asyncio.run(main())
@@ -0,0 +1,126 @@
+# app/utils/tweetDedup.py
+"""
+Near-duplicate clustering of tweets (retweets, copy-pastes with a link or
+hashtag added, small rewordings) with MinHash signatures and LSH banding.
+
+predict_tweet scores one tweet per cluster and weights it by the cluster
+size. Members of a cluster share at least TWEET_DEDUP_THRESHOLD of their
+character 5-grams (estimated), so they differ mostly in casing, emphasis,
+emoji and links. Tweets with less than one 5-gram of text left (emoji-,
+link- or mention-only) are never merged.
+
+Tolerance of the tweet sentiment result: the company score is an
+authority-weighted mean of influencer scores, so it moves no more than
+the largest influencer score does. On bench.dedup's corpus (4-10 copies
+per tweet) VADER + TextBlob influencer scores stay within 0.03 of the full
+computation on the 0-1 scale (mean 0.006-0.016), mostly VADER reacting to
+CAPS and "!!!" in copies. They are half of the ensemble, so that part
+moves the result by at most 0.015. FinBERT, the other half, is not in
+these figures; `python -m bench.dedup` (needs torch) measures the whole
+ensemble, influencer and company score.
+
+Kept free of FinBERT / MongoDB imports, like lexiconSentiment.
+"""
+import re
+import zlib
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 16  # 4 rows per band: pairs above ~0.5 similarity become candidates
+SHINGLE = 5
+# Bump when normalization, hashing or clustering changes so stored indexes get rebuilt
+DEDUP_VERSION = 2
+
+_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(1729)  # fixed: signatures must match across processes and runs
+_A = _rng.integers(1, (1 << 61) - 1, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, (1 << 61) - 1, NUM_PERM, dtype=np.uint64)
+
+_RETWEET = re.compile(r"^\s*rt\s+@\w+:?\s*", re.IGNORECASE)
+_URL = re.compile(r"https?://\S+|www\.\S+")
+_MENTION = re.compile(r"@\w+")
+_NON_WORD = re.compile(r"[^\w\s]+")  # also strips '#' from hashtags
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, without retweet prefix, links, mentions and punctuation."""
+    text = _RETWEET.sub("", text)
+    text = _URL.sub(" ", text)
+    text = _MENTION.sub(" ", text)
+    text = _NON_WORD.sub(" ", text.lower())
+    return _SPACE.sub(" ", text).strip()
+
+
+def signature(text: str) -> np.ndarray:
+    """NUM_PERM-value MinHash of the normalized text's character shingles."""
+    return _minhash(normalize(text))
+
+
+def _minhash(norm: str) -> np.ndarray:
+    shingles = {norm[i:i + SHINGLE] for i in range(max(1, len(norm) - SHINGLE + 1))}
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # (a * x + b) wraps at 2**64 before the modulo; harmless for MinHash
+    return ((hashes[:, None] * _A + _B) % _PRIME).min(axis=0)
+
+
+def near_duplicate_clusters(texts, threshold: float) -> np.ndarray:
+    """
+    For each text, the index of its cluster's first member. Texts sharing an
+    LSH band are merged if their estimated similarity reaches `threshold`
+    (single linkage, so a cluster can chain through intermediate copies).
+    Texts shorter than one shingle once normalized stay on their own: they
+    would all hash like "" and merge.
+    """
+    n = len(texts)
+    if n == 0:
+        return np.empty(0, dtype=int)
+    norms = [normalize(t) for t in texts]
+    signatures = np.stack([_minhash(norm) for norm in norms])
+    comparable = [len(norm) >= SHINGLE for norm in norms]
+    parent = np.arange(n)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = NUM_PERM // BANDS
+    for band in range(BANDS):
+        buckets = {}
+        for i, key in enumerate(signatures[:, band * rows:(band + 1) * rows]):
+            if not comparable[i]:
+                continue
+            buckets.setdefault(key.tobytes(), []).append(i)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            sigs = signatures[members]
+            similar = (sigs[:, None, :] == sigs[None, :, :]).mean(axis=-1) >= threshold
+            for a, b in zip(*np.nonzero(np.triu(similar, k=1))):
+                ra, rb = find(members[a]), find(members[b])
+                if ra != rb:
+                    parent[max(ra, rb)] = min(ra, rb)  # the root stays the earliest tweet
+    return np.array([find(i) for i in range(n)])
+
+
+def index_tweets(doc: dict, threshold: float) -> dict:
+    """Store each tweet's cluster (index of its first member) on a db.tweets document, in place."""
+    tweets = doc.get("tweets", [])
+    clusters = near_duplicate_clusters([t["tweet_text"] for t in tweets], threshold)
+    for tweet, cluster in zip(tweets, clusters):
+        tweet["cluster"] = int(cluster)
+    doc["dedup"] = {"version": DEDUP_VERSION, "threshold": threshold}
+    return doc
+
+
+def stored_clusters(doc: dict, threshold: float):
+    """Clusters saved by index_tweets() if they are still valid for this document, else None."""
+    if doc.get("dedup") != {"version": DEDUP_VERSION, "threshold": threshold}:
+        return None
+    tweets = doc.get("tweets", [])
+    clusters = [t.get("cluster") for t in tweets]
+    if any(not isinstance(c, int) or not 0 <= c <= i for i, c in enumerate(clusters)):
+        return None
+    return np.asarray(clusters, dtype=int)
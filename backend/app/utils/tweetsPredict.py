@@ -1,14 +1,24 @@
 import asyncio
+import hashlib
+import logging
+import math
 import random
-from tqdm import tqdm
+import time
+from datetime import date
+import numpy as np
 import pandas as pd
 import torch
 import torch.nn.functional as F
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from textblob import TextBlob
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import settings
+from app.utils.adaptiveSampling import SampledMean, weighted_interval, z_value
+from app.utils.lexiconSentiment import lexicon_scores
+from app.utils.metrics import TWEETS_DEDUPLICATED, run_in_thread, stage
+from app.utils.modelLoader import load_sequence_classifier
+from app.utils.sharedCache import SharedCache, shared_tier
+from app.utils.tweetDedup import near_duplicate_clusters, stored_clusters
+
+logger = logging.getLogger(__name__)
 
 
 # === MongoDB Setup ===
@@ -17,12 +27,17 @@ db = client[settings.DATABASE_NAME]
 
 
 # === Load Sentiment Models ===
-print("🔹 Loading sentiment models...")
-vader = SentimentIntensityAnalyzer()
-finbert_model_name = "yiyanghkust/finbert-tone"
-tokenizer = AutoTokenizer.from_pretrained(finbert_model_name)
-finbert_model = AutoModelForSequenceClassification.from_pretrained(finbert_model_name)
-print("✅ Sentiment models loaded.")
+logger.info("Loading sentiment models...")
+finbert_model_name = settings.FINBERT_MODEL
+tokenizer, finbert_model = load_sequence_classifier(finbert_model_name)
+logger.info("Sentiment models loaded.")
+
+FINBERT_BATCH_SIZE = 32
+
+# Influencer -> mean ensemble score, keyed by a digest of their tweets so new tweets miss.
+# Influencers are shared between companies, so this also saves work across tickers.
+influencer_cache = SharedCache("influencer_sentiment", shared_tier, ttl=settings.SENTIMENT_CACHE_TTL,
+                               local_items=1024)
 
 
 # === Helper Functions ===
@@ -40,33 +55,176 @@ def finbert_sentiment(text: str) -> float:
     return score
 
 
-async def predict_tweet(company_name: str) -> float:
+def finbert_sentiment_batch(texts) -> np.ndarray:
+    """FinBERT scores in [-1, 1] for a list of texts, FINBERT_BATCH_SIZE at a time."""
+    scores = []
+    with torch.inference_mode():
+        for i in range(0, len(texts), FINBERT_BATCH_SIZE):
+            inputs = tokenizer(texts[i:i + FINBERT_BATCH_SIZE], return_tensors="pt",
+                               truncation=True, max_length=512, padding=True)
+            probs = F.softmax(finbert_model(**inputs).logits, dim=-1).numpy()
+            scores.append(probs[:, 1] - probs[:, 2])  # positive - negative
+    return np.concatenate(scores) if scores else np.empty(0)
+
+
+def cluster_tweets(doc: dict, tweets: list) -> np.ndarray:
+    """Near-duplicate clusters stored at ingestion, computed here if missing or stale."""
+    if not settings.TWEET_DEDUP:
+        return np.arange(len(tweets))
+    clusters = stored_clusters(doc, settings.TWEET_DEDUP_THRESHOLD)
+    if clusters is None:
+        clusters = near_duplicate_clusters(tweets, settings.TWEET_DEDUP_THRESHOLD)
+    return clusters
+
+
+def ensemble_scores(texts) -> np.ndarray:
+    """0-1 score per text: 0.3 VADER + 0.2 TextBlob + 0.5 FinBERT."""
+    v, t = lexicon_scores(texts)
+    with stage("finbert_batch", size=len(texts)):
+        f = normalize_score(finbert_sentiment_batch(texts))
+    return 0.3 * v + 0.2 * t + 0.5 * f
+
+
+class InfluencerSample:
     """
-    Analyzes tweet sentiments for a company's influencers.
-    Returns a final authority-weighted sentiment score (0–1).
+    One influencer's tweets, scored all at once (score_all) or in batches
+    in a random order (score_batch). Either way each near-duplicate cluster
+    is scored once and every member gets its score, so a finished sample
+    equals the full computation.
+    """
+
+    def __init__(self, name: str, authority: float, doc: dict, tweets: list, rng: np.random.Generator):
+        self.name = name
+        self.authority = authority
+        self.tweets = tweets
+        self._doc = doc
+        self._clusters = None
+        self._cluster_scores = {}
+        dedup = settings.TWEET_DEDUP_THRESHOLD if settings.TWEET_DEDUP else None
+        digest = hashlib.sha1("\x1e".join([str(dedup), *tweets]).encode()).hexdigest()[:16]
+        self.key = (name, digest)
+        self.sample = SampledMean(len(tweets), rng)
+
+    async def load_cached(self):
+        """Start from an exact score if one is cached."""
+        cached = await influencer_cache.aget(self.key)
+        if cached is not None:
+            self.sample = SampledMean.exact(cached, len(self.tweets))
+
+    def _cluster_ids(self) -> np.ndarray:
+        if self._clusters is None:
+            self._clusters = cluster_tweets(self._doc, self.tweets)
+        return self._clusters
+
+    def _analyze_tweets(self) -> float:
+        # One tweet per near-duplicate cluster, weighted by the cluster's size
+        firsts, sizes = np.unique(self._cluster_ids(), return_counts=True)
+        TWEETS_DEDUPLICATED.inc(len(self.tweets) - len(firsts))
+        return float(np.average(ensemble_scores([self.tweets[i] for i in firsts]), weights=sizes))
+
+    async def score_all(self):
+        if self.sample.done:
+            return
+
+        # Run in background thread (FinBERT heavy)
+        async def compute():
+            return await run_in_thread("sentiment", self._analyze_tweets)
+
+        score = await influencer_cache.aget_or_compute(self.key, compute)
+        self.sample = SampledMean.exact(score, len(self.tweets))
+
+    def score_batch(self, size: int):
+        """Score the next `size` tweets of the random order (blocking, FinBERT heavy)."""
+        clusters = self._cluster_ids()[self.sample.next_indices(size)]
+        new = [c for c in np.unique(clusters) if c not in self._cluster_scores]
+        if new:
+            self._cluster_scores.update(zip(new, ensemble_scores([self.tweets[c] for c in new])))
+        TWEETS_DEDUPLICATED.inc(len(clusters) - len(new))
+        self.sample.add([self._cluster_scores[c] for c in clusters])
+
+    async def save_if_complete(self):
+        """Cache the score if sampling happened to cover every tweet."""
+        if self.sample.done and self._cluster_scores:
+            score = self.sample.mean
+
+            async def compute():
+                return score
+
+            await influencer_cache.aget_or_compute(self.key, compute)
+
+
+async def sample_until_confident(samples: list, weights: np.ndarray, z: float):
+    """
+    Score random batches until the weighted company score's confidence
+    interval is within ±SENTIMENT_EPSILON, every tweet is scored, or
+    SENTIMENT_TIME_BUDGET runs out. The budget covers first batches too; it
+    is checked between batches, so it can be overrun by one batch. If it
+    runs out before every influencer has a first batch, the rest are left
+    out of the score (see sampled_weights).
+    """
+    batch = settings.SENTIMENT_SAMPLE_BATCH
+    deadline = time.monotonic() + settings.SENTIMENT_TIME_BUDGET
+    # A first batch per influencer, highest authority first, so every mean and variance is defined
+    for i in np.argsort(-weights, kind="stable"):
+        if not weights[i] or samples[i].sample.done:
+            continue
+        if time.monotonic() >= deadline and sampled_weights(samples, weights).any():
+            return
+        await run_in_thread("sentiment", samples[i].score_batch, batch)
+
+    while time.monotonic() < deadline:
+        _, half_width = weighted_interval([s.sample for s in samples], weights, z)
+        if half_width <= settings.SENTIMENT_EPSILON:
+            break
+        # Next batch to the influencer contributing most to the company score's variance
+        contributions = [w * w * s.sample.variance() if w else 0.0 for w, s in zip(weights, samples)]
+        target = int(np.argmax(contributions))
+        if not contributions[target]:
+            break
+        await run_in_thread("sentiment", samples[target].score_batch, batch)
+
+
+def sampled_weights(samples: list, weights: np.ndarray) -> np.ndarray:
+    """Authority weights, zeroed for influencers without a single scored tweet."""
+    return np.where([s.sample.n > 0 for s in samples], weights, 0.0)
+
+
+def _no_data(score: float) -> dict:
+    return {"score": score, "half_width": None, "confidence": None, "approximate": False,
+            "tweets_scored": 0, "tweets_total": 0, "influencers": []}
+
+
+async def tweet_sentiment(company_name: str, approximate: bool = None) -> dict:
     """
-    print(f"\n📌 Starting sentiment prediction for {company_name}...")
+    Authority-weighted sentiment (0–1) of a company's influencers, with the
+    half-width of its confidence interval at the given confidence level (0
+    when every tweet was scored), tweet counts and per-influencer scores.
+    approximate=None follows settings.SENTIMENT_SAMPLING.
+    """
+    approximate = settings.SENTIMENT_SAMPLING if approximate is None else approximate
+    logger.info("Starting sentiment prediction for %s (approximate=%s)", company_name, approximate)
 
     # 1️⃣ Get company influencers
-    company = await db.companyData.find_one({"symbol": company_name.upper()})
+    with stage("db_fetch", collection="companyData"):
+        company = await db.companyData.find_one({"symbol": company_name.upper()})
     if not company:
-        print(f"❌ Company {company_name} not found in DB")
+        logger.warning("Company %s not found in DB", company_name)
         guess = round(random.uniform(0.4, 0.6), 4)
-        return guess
+        return _no_data(guess)
 
     influencers = company.get("influential_people", [])
     if not influencers:
-        print(f"❌ No influencers found for {company_name}")
-        return 0.5
-
-    print(f"🔹 Found influencers: {influencers}")
+        logger.warning("No influencers found for %s", company_name)
+        return _no_data(0.5)
 
-    influencer_scores = []
-    authority_scores = []
+    logger.debug("Found influencers for %s: %s", company_name, influencers)
 
-    # 2️⃣ Process each influencer with tqdm
-    for name in tqdm(influencers, desc="Processing Influencers"):
-        doc = await db.tweets.find_one({"influencer.name": name})
+    # 2️⃣ Load each influencer's tweets
+    rng = np.random.default_rng()
+    samples = []
+    for name in influencers:
+        with stage("db_fetch", collection="tweets"):
+            doc = await db.tweets.find_one({"influencer.name": name})
         if not doc or "tweets" not in doc:
             continue
 
@@ -74,34 +232,72 @@ async def predict_tweet(company_name: str) -> float:
         tweets = [t["tweet_text"] for t in doc["tweets"]]
         if not tweets:
             continue
+        samples.append(InfluencerSample(name, authority, doc, tweets, rng))
 
-        # Run in background thread (FinBERT heavy)
-        def analyze_tweets():
-            scores = []
-            for tweet in tqdm(tweets, desc=f"Tweets of {name}", leave=False):
-                v = normalize_score(vader.polarity_scores(tweet)["compound"])
-                t = normalize_score(TextBlob(tweet).sentiment.polarity)
-                f = normalize_score(finbert_sentiment(tweet))
-                ensemble = 0.3 * v + 0.2 * t + 0.5 * f
-                scores.append(ensemble)
-            avg_score = sum(scores) / len(scores)
-            return avg_score
-
-        avg_influencer_score = await asyncio.to_thread(analyze_tweets)
-        influencer_scores.append(avg_influencer_score)
-        authority_scores.append(authority)
-
-    # 3️⃣ Compute authority-weighted final score
-    if not influencer_scores:
-        print(f"⚠️ No tweets found for {company_name}")
-        return 0.5
-
-    weighted_sum = sum(s * a for s, a in zip(influencer_scores, authority_scores))
-    total_auth = sum(authority_scores)
-    final_score = round(weighted_sum / total_auth if total_auth else 0.5, 4)
-
-    print(f"\n📊 Final authority-weighted sentiment for {company_name}: {round(final_score, 4)}")
-    return float(final_score)
+    if not samples:
+        logger.warning("No tweets found for %s", company_name)
+        return _no_data(0.5)
+    weights = np.array([s.authority for s in samples], dtype=float)
+    if not weights.sum():
+        return _no_data(0.5)
+
+    # 3️⃣ Score every tweet, or random batches until the interval is tight enough
+    z = z_value(settings.SENTIMENT_CONFIDENCE)
+    if approximate:
+        for s in samples:
+            await s.load_cached()
+        await sample_until_confident(samples, weights, z)
+        for s in samples:
+            await s.save_if_complete()
+    else:
+        for s in samples:
+            await s.score_all()
+
+    # 4️⃣ Compute authority-weighted final score
+    score, half_width = weighted_interval([s.sample for s in samples], sampled_weights(samples, weights), z)
+    result = {
+        "score": round(score, 4),
+        "half_width": round(half_width, 4) if math.isfinite(half_width) else None,
+        "confidence": settings.SENTIMENT_CONFIDENCE,
+        "approximate": not all(s.sample.done for s in samples),
+        "tweets_scored": sum(s.sample.n for s in samples),
+        "tweets_total": sum(s.sample.population for s in samples),
+        "influencers": [
+            {
+                "name": s.name,
+                "authority": s.authority,
+                "score": round(s.sample.mean, 4) if s.sample.n else None,
+                "half_width": round(z * math.sqrt(s.sample.variance()), 4)
+                if math.isfinite(s.sample.variance()) else None,
+                "tweets_scored": s.sample.n,
+                "tweets_total": s.sample.population,
+            }
+            for s in samples
+        ],
+    }
+    logger.info("Final authority-weighted sentiment for %s: %s ± %s (%d/%d tweets)", company_name,
+                result["score"], result["half_width"], result["tweets_scored"], result["tweets_total"])
+
+    # One snapshot per ticker per day; app.services.backtest replays these.
+    # Sampled scores are left out so the backtest history stays exact.
+    if not result["approximate"]:
+        try:
+            await db.sentimentSnapshots.update_one(
+                {"ticker": company_name.upper(), "date": date.today().isoformat()},
+                {"$set": {"score": float(result["score"])}},
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning("Could not store sentiment snapshot for %s: %s", company_name, e)
+    return result
+
+
+async def predict_tweet(company_name: str, approximate: bool = None) -> float:
+    """
+    Analyzes tweet sentiments for a company's influencers.
+    Returns a final authority-weighted sentiment score (0–1).
+    """
+    return (await tweet_sentiment(company_name, approximate))["score"]
 
 
 # === Example Usage ===
@@ -0,0 +1,107 @@
+# bench/cache.py
+"""
+Cold-start behaviour of the shared cache across worker processes.
+
+Usage (from backend/):
+    python -m bench.cache [--workers 4] [--keys 20] [--compute 0.2]
+Each worker asks for the same keys (a forecast-sized DataFrame that takes
+--compute seconds to build). With the per-process "memory" tier every worker
+computes every key; with "sqlite" each key should be computed once per host.
+Also prints msgpack vs pickle size and speed for one cached value.
+"""
+import argparse
+import multiprocessing
+import os
+import pickle
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench.harness import BENCH_ENV
+
+
+def forecast_frame(seed: int) -> pd.DataFrame:
+    """Shaped like predict_stock's cached frame: 5 years of history + a 365-day forecast."""
+    rng = np.random.default_rng(seed)
+    n = 5 * 365 + 365
+    predicted = 100 + rng.standard_normal(n).cumsum()
+    return pd.DataFrame({
+        "ds": pd.date_range("2020-10-17", periods=n, freq="D"),
+        "predicted": predicted,
+        "lower": predicted - 5,
+        "upper": predicted + 5,
+        "actual": np.where(np.arange(n) < n - 365, predicted + rng.standard_normal(n), 0.0),
+    })
+
+
+def worker(backend: str, path: str, keys: int, compute_seconds: float, start_at: float, results):
+    os.environ.update({**BENCH_ENV, "CACHE_BACKEND": backend, "CACHE_PATH": path})
+    from app.utils.sharedCache import SharedCache, make_tier
+
+    cache = SharedCache("bench", make_tier(backend), ttl=600)
+    computed = 0
+
+    def compute(seed):
+        nonlocal computed
+        computed += 1
+        time.sleep(compute_seconds)
+        return {"ticker": f"T{seed}", "data": forecast_frame(seed)}
+
+    time.sleep(max(0.0, start_at - time.time()))  # start together, like workers after a deploy
+    begin = time.perf_counter()
+    for seed in range(keys):
+        cache.get_or_compute(seed, lambda: compute(seed))
+    results.put((computed, time.perf_counter() - begin))
+
+
+def run(backend: str, workers: int, keys: int, compute_seconds: float):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        ctx = multiprocessing.get_context("spawn")
+        results = ctx.Queue()
+        start_at = time.time() + 3.0  # leave time for the spawned interpreters to import
+        procs = [ctx.Process(target=worker, args=(backend, path, keys, compute_seconds, start_at, results))
+                 for _ in range(workers)]
+        for p in procs:
+            p.start()
+        outcomes = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+    computed = sum(c for c, _ in outcomes)
+    slowest = max(w for _, w in outcomes)
+    print(f"  {backend:<7} computations={computed:<5} (keys={keys}, workers={workers})  "
+          f"slowest worker={slowest:6.2f}s")
+
+
+def serialization():
+    os.environ.update(BENCH_ENV)
+    from app.utils.sharedCache import packb, unpackb
+
+    value = {"ticker": "AAPL", "data": forecast_frame(0)}
+    for name, dump, load in [("msgpack", packb, unpackb), ("pickle", pickle.dumps, pickle.loads)]:
+        blob = dump(value)
+        start = time.perf_counter()
+        for _ in range(200):
+            load(dump(value))
+        per = (time.perf_counter() - start) / 200
+        print(f"  {name:<8} {len(blob) / 1024:8.1f} KiB  round trip {per * 1000:6.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--keys", type=int, default=20)
+    parser.add_argument("--compute", type=float, default=0.2, help="seconds to build each value")
+    args = parser.parse_args()
+
+    print("🧊 Cold start")
+    for backend in ("memory", "sqlite"):
+        run(backend, args.workers, args.keys, args.compute)
+    print("📦 Serialization (forecast frame)")
+    serialization()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# bench/compare.py
+"""
+Compare two bench reports and flag regressions.
+
+Usage (from backend/):
+    python -m bench.compare base.json head.json [--metric p50] [--threshold 0.10]
+Exits non-zero when any benchmark slowed down by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--metric", default="p50", choices=["mean", "p50", "p95", "p99", "max"])
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    base, head = load(args.base), load(args.head)
+    print(f"{base['meta'].get('revision')} -> {head['meta'].get('revision')}  ({args.metric})")
+    print(f"{'benchmark':<40} {'base ms':>10} {'head ms':>10} {'change':>8}")
+
+    regressions = []
+    for name in sorted(set(base["results"]) | set(head["results"])):
+        b = base["results"].get(name, {}).get(args.metric)
+        h = head["results"].get(name, {}).get(args.metric)
+        if b is None or h is None:
+            print(f"{name:<40} {'-' if b is None else f'{b * 1000:10.2f}':>10} {'-' if h is None else f'{h * 1000:10.2f}':>10}")
+            continue
+        change = (h - b) / b if b else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  ⚠️"
+            regressions.append(name)
+        print(f"{name:<40} {b * 1000:10.2f} {h * 1000:10.2f} {change:+8.1%}{flag}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+    print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# bench/dedup.py
+"""
+FinBERT calls saved by near-duplicate clustering, and what it costs in accuracy.
+
+Usage (from backend/):
+    python -m bench.dedup [--copies 4] [--threshold 0.7] [--lexicon-only]
+Builds a stream per influencer from data.json in which every tweet is
+followed by a Poisson(--copies) number of the copies seen on the real feed:
+retweets, link / hashtag / emoji suffixes, case and punctuation changes and
+truncated quotes. Scores every tweet, then one tweet per cluster weighted
+by cluster size, and compares the influencer scores and the company score
+(their mean, i.e. equal authority). --lexicon-only skips
+FinBERT (no torch needed) and scores with VADER + TextBlob alone.
+"""
+import argparse
+import os
+import random
+import string
+import time
+
+import numpy as np
+
+from bench.fakes import load_tweet_fixtures
+from bench.harness import BENCH_ENV
+
+
+def variant(text: str, handles: list, rng: random.Random) -> str:
+    kind = rng.choice(["retweet", "link", "hashtags", "emoji", "case", "punctuation", "truncated", "quote"])
+    if kind == "retweet":
+        return f"RT @{rng.choice(handles)}: {text}"
+    if kind == "link":
+        return f"{text} https://t.co/{''.join(rng.choices(string.ascii_letters + string.digits, k=10))}"
+    if kind == "hashtags":
+        return f"{text} #JNJ #{rng.choice(['pharma', 'healthcare', 'stocks', 'news'])}"
+    if kind == "emoji":
+        return f"{text} {rng.choice(['😡', '👀', '📉', '🔥', '💯'])}"
+    if kind == "case":
+        return text.lower() if rng.random() < 0.5 else text.upper()
+    if kind == "punctuation":
+        return text.replace("!", "!!!").replace(".", "").replace("’", "'")
+    if kind == "truncated":
+        return f"RT @{rng.choice(handles)}: {text[:int(len(text) * 0.8)]}…"
+    return f"{rng.choice(['This.', 'Exactly:', 'Again,', 'Read this:'])} {text}"
+
+
+def build_streams(copies: float, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    docs = load_tweet_fixtures()
+    handles = [d["influencer"]["handle"].lstrip("@") for d in docs]
+    streams = {}
+    for doc in docs:
+        stream = []
+        for tweet in doc["tweets"]:
+            stream.append(tweet["tweet_text"])
+            stream.extend(variant(tweet["tweet_text"], handles, rng) for _ in range(np_rng.poisson(copies)))
+        rng.shuffle(stream)
+        streams[doc["influencer"]["name"]] = stream
+    return streams
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--copies", type=float, default=4.0, help="mean copies per original tweet")
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--lexicon-only", action="store_true")
+    args = parser.parse_args()
+
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+    from app.utils.lexiconSentiment import lexicon_scores
+    from app.utils.tweetDedup import near_duplicate_clusters
+
+    if args.lexicon_only:
+        def score(texts):
+            v, t = lexicon_scores(texts)
+            return 0.6 * v + 0.4 * t
+    else:
+        from app.utils.tweetsPredict import finbert_sentiment_batch, normalize_score
+
+        def score(texts):
+            v, t = lexicon_scores(texts)
+            return 0.3 * v + 0.2 * t + 0.5 * normalize_score(finbert_sentiment_batch(texts))
+
+    streams = build_streams(args.copies)
+    mode = "VADER + TextBlob" if args.lexicon_only else "VADER + TextBlob + FinBERT"
+    print(f"🪞 Near-duplicate scoring ({mode}, threshold {args.threshold})")
+    print(f"  {'influencer':<18} {'tweets':>6} {'scored':>6} {'full':>8} {'dedup':>8} {'|diff|':>8}")
+
+    totals = {"tweets": 0, "scored": 0, "full_s": 0.0, "dedup_s": 0.0, "cluster_s": 0.0}
+    diffs, fulls, dedups = [], [], []
+    for name, tweets in streams.items():
+        start = time.perf_counter()
+        full = float(score(tweets).mean())
+        totals["full_s"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        clusters = near_duplicate_clusters(tweets, args.threshold)
+        totals["cluster_s"] += time.perf_counter() - start
+        firsts, sizes = np.unique(clusters, return_counts=True)
+        start = time.perf_counter()
+        dedup = float(np.average(score([tweets[i] for i in firsts]), weights=sizes))
+        totals["dedup_s"] += time.perf_counter() - start
+
+        totals["tweets"] += len(tweets)
+        totals["scored"] += len(firsts)
+        diffs.append(abs(full - dedup))
+        fulls.append(full)
+        dedups.append(dedup)
+        print(f"  {name:<18} {len(tweets):>6} {len(firsts):>6} {full:>8.4f} {dedup:>8.4f} {diffs[-1]:>8.4f}")
+
+    saved = totals["tweets"] - totals["scored"]
+    print(f"  model calls saved: {saved}/{totals['tweets']} ({saved / totals['tweets']:.0%}); "
+          f"max |diff| {max(diffs):.4f}, mean {np.mean(diffs):.4f}")
+    print(f"  company score: full {np.mean(fulls):.4f}, dedup {np.mean(dedups):.4f}, "
+          f"|diff| {abs(np.mean(fulls) - np.mean(dedups)):.4f}")
+    print(f"  scoring time: full {totals['full_s']:.3f}s, clustered {totals['dedup_s']:.3f}s "
+          f"+ clustering {totals['cluster_s']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# bench/fakes.py
+"""
+Offline stand-ins for the app's upstreams: Yahoo Finance, MongoDB and Gemini.
+Everything here is deterministic so reports from different commits compare.
+"""
+import asyncio
+import json
+import time
+import zlib
+from datetime import date, timedelta
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+# Fixed "today" so period-based queries return the same rows on every run
+AS_OF = date(2025, 10, 17)
+
+PERIOD_ROWS = {
+    "1d": 1, "5d": 5, "1mo": 21, "3mo": 63, "6mo": 126,
+    "1y": 252, "2y": 504, "5y": 1260, "60d": 42, "max": None,
+}
+
+
+# ---------------------------
+# Yahoo Finance
+# ---------------------------
+def _synthetic_series(ticker: str) -> pd.DataFrame:
+    """Seeded geometric random walk over business days, one per ticker."""
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+    index = pd.bdate_range("2015-01-01", AS_OF, name="Date")
+    returns = rng.normal(0.0004, 0.018, len(index))
+    close = (50 + rng.random() * 400) * np.exp(np.cumsum(returns))
+    spread = np.abs(rng.normal(0, 0.01, len(index))) * close
+    return pd.DataFrame({
+        "Open": close - spread / 2,
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 50_000_000, len(index)),
+    }, index=index)
+
+
+class FakeYahoo:
+    """
+    Serves OHLCV frames from bench/fixtures/<TICKER>.csv (see bench.record),
+    falling back to a synthetic series for tickers without a recording.
+    Optional latency / error injection mimics a throttled upstream.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self._rng = np.random.default_rng(seed)
+        self._frames = {}
+
+    def frame(self, ticker: str) -> pd.DataFrame:
+        ticker = ticker.upper()
+        if ticker not in self._frames:
+            path = FIXTURES_DIR / f"{ticker}.csv"
+            if path.exists():
+                df = pd.read_csv(path, index_col="Date", parse_dates=True)
+            else:
+                df = _synthetic_series(ticker)
+            self._frames[ticker] = df
+        return self._frames[ticker]
+
+    def _upstream_call(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise ConnectionError("fake upstream: injected error")
+
+    def _slice(self, ticker, start=None, end=None, period=None):
+        df = self.frame(ticker)
+        df = df[df.index.date <= AS_OF]
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df.index < pd.Timestamp(end)]
+        if start is None and period is not None:
+            rows = PERIOD_ROWS.get(period, 21)
+            if rows is not None:
+                df = df.iloc[-rows:]
+        return df.copy()
+
+    def history(self, ticker, period="1mo", start=None, end=None, **kwargs):
+        self._upstream_call()
+        return self._slice(ticker, start=start, end=end, period=period)
+
+    def download(self, tickers, start=None, end=None, period=None, **kwargs):
+        self._upstream_call()
+        if isinstance(tickers, str):
+            tickers = tickers.replace(",", " ").split()
+        frames = {t.upper(): self._slice(t, start=start, end=end, period=period or "1mo") for t in tickers}
+        # yfinance returns (Price, Ticker) column levels, even for one ticker
+        merged = pd.concat(frames, axis=1)
+        merged.columns = merged.columns.swaplevel(0, 1)
+        merged.columns.names = ["Price", "Ticker"]
+        return merged.sort_index(axis=1)
+
+
+class FakeTicker:
+    def __init__(self, upstream: FakeYahoo, ticker: str):
+        self._upstream = upstream
+        self.ticker = ticker
+
+    def history(self, *args, **kwargs):
+        return self._upstream.history(self.ticker, *args, **kwargs)
+
+
+# ---------------------------
+# Gemini
+# ---------------------------
+class FakeMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class FakeLLM:
+    """
+    Answers every prompt with canned text after a fixed delay; astream()
+    yields it word by word. prompt_chars counts what was sent to the model.
+    """
+
+    def __init__(self, latency: float = 0.05, chunk_latency: float = 0.002,
+                 reply: str = "Neutral outlook: forecast and sentiment roughly balance."):
+        self.latency = latency
+        self.chunk_latency = chunk_latency
+        self.reply = reply
+        self.calls = 0
+        self.prompt_chars = 0
+
+    def _count(self, prompt):
+        self.calls += 1
+        if isinstance(prompt, str):
+            self.prompt_chars += len(prompt)
+        else:
+            self.prompt_chars += sum(len(m.content) for m in prompt)
+
+    async def ainvoke(self, prompt):
+        self._count(prompt)
+        await asyncio.sleep(self.latency)
+        return FakeMessage(self.reply)
+
+    async def astream(self, prompt):
+        self._count(prompt)
+        await asyncio.sleep(self.latency)
+        words = self.reply.split(" ")
+        for i, word in enumerate(words):
+            yield FakeMessage(word if i == len(words) - 1 else word + " ")
+            await asyncio.sleep(self.chunk_latency)
+
+
+# ---------------------------
+# MongoDB
+# ---------------------------
+def load_tweet_fixtures():
+    with open(BACKEND_DIR / "data.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def seed_db(db, users: int = 50):
+    """Populate an in-memory database the way the real one is laid out."""
+    from app.config import settings
+    from app.scripts.insert_companies import companies
+    from app.utils.tweetDedup import index_tweets
+
+    await db.companies.insert_many([dict(c) for c in companies])
+
+    tweet_docs = [index_tweets(doc, settings.TWEET_DEDUP_THRESHOLD) for doc in load_tweet_fixtures()]
+    await db.tweets.insert_many(tweet_docs)
+    influencers = [d["influencer"]["name"] for d in tweet_docs]
+    # data.json holds J&J influencers; reuse them for every ticker
+    await db.companyData.insert_many([
+        {"symbol": c["ticker"], "influential_people": influencers} for c in companies
+    ])
+
+    rng = np.random.default_rng(42)
+    tickers = [c["ticker"] for c in companies]
+    user_docs = []
+    for i in range(users):
+        holdings = rng.choice(tickers, size=int(rng.integers(1, 6)), replace=False)
+        user_docs.append({
+            "username": f"bench{i}",
+            "email": f"bench{i}@example.com",
+            "password": None,
+            "portfolio": [{
+                "companyId": str(t),
+                "quantity": int(rng.integers(1, 100)),
+                "purchaseDate": (AS_OF - timedelta(days=int(rng.integers(30, 900)))).isoformat(),
+            } for t in holdings],
+            "profit": 0.0,
+        })
+    await db.users.insert_many(user_docs)
+
+
+def make_fake_db(name: str = "FinTweetBench"):
+    from mongomock_motor import AsyncMongoMockClient
+    return AsyncMongoMockClient()[name]
@@ -0,0 +1,186 @@
+# bench/harness.py
+"""
+Wires the fakes into the app and collects timings into a JSON report.
+"""
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+import numpy as np
+
+from bench.fakes import FakeLLM, FakeTicker, FakeYahoo, make_fake_db, seed_db
+
+# Settings() refuses to start without these; none of them are contacted.
+BENCH_ENV = {
+    "MONGODB_URL": "mongodb://bench.invalid:27017",
+    "DATABASE_NAME": "FinTweetBench",
+    "JWT_SECRET": "bench-secret",
+    "GEMINI_API_KEY": "bench-key",
+    # The fake upstream has no quota; don't let the limiter dominate timings
+    "YAHOO_RATE_PER_SEC": "10000",
+    "YAHOO_BURST": "10000",
+    # Time the pipelines, not cache hits (bench.run --cache-backend / bench.cache cover caching)
+    "CACHE_BACKEND": "none",
+}
+
+
+class Environment:
+    """Handles to the stand-ins installed by install()."""
+
+    def __init__(self, yahoo, db, llm):
+        self.yahoo = yahoo
+        self.db = db
+        self.llm = llm
+
+
+async def install(yahoo_latency: float = 0.0, yahoo_error_rate: float = 0.0,
+                  llm_latency: float = 0.05, users: int = 50) -> Environment:
+    """
+    Point every upstream the app touches at an offline stand-in.
+    Must run before the first `import app...`.
+    """
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+
+    import yfinance as yf
+    yahoo = FakeYahoo(latency=yahoo_latency, error_rate=yahoo_error_rate)
+    yf.download = yahoo.download
+    yf.Ticker = lambda ticker, *args, **kwargs: FakeTicker(yahoo, ticker)
+
+    db = make_fake_db(os.environ["DATABASE_NAME"])
+    await seed_db(db, users=users)
+
+    llm = FakeLLM(latency=llm_latency)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    async def fake_llm_model(temp: float = 0.1):
+        return llm
+
+    import app.main  # noqa: F401  (imports every route / service module)
+    import app.utils.llmHelper
+    import app.services.analyzeStock
+
+    # Each module opens its own Motor client; swap them all for the fake one
+    for name, module in list(sys.modules.items()):
+        if name == "app" or name.startswith("app."):
+            if hasattr(module, "db"):
+                module.db = db
+    app.utils.llmHelper.llm_model = fake_llm_model
+    app.services.analyzeStock.llm_model = fake_llm_model
+
+    return Environment(yahoo, db, llm)
+
+
+# ---------------------------
+# Timing
+# ---------------------------
+def summarize(samples):
+    """Latency stats (seconds) for a list of samples."""
+    arr = np.asarray(samples, dtype=float)
+    return {
+        "n": int(arr.size),
+        "mean": float(arr.mean()),
+        "stdev": float(statistics.stdev(arr)) if arr.size > 1 else 0.0,
+        "min": float(arr.min()),
+        "p50": float(np.percentile(arr, 50)),
+        "p95": float(np.percentile(arr, 95)),
+        "p99": float(np.percentile(arr, 99)),
+        "max": float(arr.max()),
+    }
+
+
+def time_sync(fn, repeat: int = 5, warmup: int = 1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def time_async(fn, repeat: int = 5, warmup: int = 1):
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def asgi_stream(app, method: str, path: str, headers: dict = None, body: bytes = b""):
+    """
+    Drive an ASGI app directly and return [(seconds since start, body chunk)].
+    httpx.ASGITransport buffers the whole response, which hides streaming.
+    """
+    start = time.perf_counter()
+    chunks = []
+    finished = asyncio.Event()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "server": ("bench", 80), "client": ("127.0.0.1", 0),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            if message.get("body"):
+                chunks.append((time.perf_counter() - start, message["body"]))
+            if not message.get("more_body"):
+                finished.set()
+
+    await app(scope, receive, send)
+    return chunks
+
+
+# ---------------------------
+# Report
+# ---------------------------
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+class Report:
+    def __init__(self):
+        self.meta = {
+            "revision": _git_revision(),
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        }
+        self.results = {}
+
+    def add(self, name: str, samples, **extra):
+        self.results[name] = {**summarize(samples), **extra}
+        r = self.results[name]
+        print(f"  {name:<40} n={r['n']:<5} p50={r['p50'] * 1000:9.2f}ms  p99={r['p99'] * 1000:9.2f}ms")
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"meta": self.meta, "results": self.results}, f, indent=2)
+        print(f"📝 Report written to {path}")
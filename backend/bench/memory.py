@@ -0,0 +1,88 @@
+# bench/memory.py
+"""
+Per-worker memory of the FinBERT model as the worker count grows.
+
+Usage (from backend/):
+    python -m bench.memory [--workers 1,2,4,8] [--synthetic]
+Starts N spawned processes that import app.utils.tweetsPredict (as a uvicorn
+worker does) and score one batch, then reports USS (memory only that worker
+holds) and PSS (its fair share of shared pages), with the model loaded as a
+private copy (MODEL_MMAP=false) and memory-mapped (MODEL_MMAP=true).
+--synthetic swaps in a random BERT-base sized classifier, so the numbers
+are realistic without downloading finbert-tone. Linux only (PSS).
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+
+import psutil
+
+from bench.harness import BENCH_ENV
+
+MIB = 1024 * 1024
+
+
+def worker(env: dict, ready, done):
+    os.environ.update(env)
+    from app.utils.tweetsPredict import finbert_sentiment_batch
+
+    finbert_sentiment_batch(["Earnings beat expectations and guidance was raised."] * 32)
+    ready.put(os.getpid())
+    done.wait()
+
+
+def measure(env: dict, workers: int):
+    ctx = multiprocessing.get_context("spawn")
+    ready, done = ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=worker, args=(env, ready, done)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    pids = [ready.get(timeout=600) for _ in procs]
+    infos = [psutil.Process(pid).memory_full_info() for pid in pids]
+    done.set()
+    for p in procs:
+        p.join()
+    uss = sum(i.uss for i in infos) / workers / MIB
+    pss = sum(i.pss for i in infos) / workers / MIB
+    total = sum(i.pss for i in infos) / MIB
+    return uss, pss, total
+
+
+def synthetic_model(path: str) -> str:
+    """Random classifier with finbert-tone's shape (BERT-base, 3 labels)."""
+    from transformers import AutoTokenizer, BertConfig, BertForSequenceClassification
+
+    config = BertConfig(vocab_size=30873, num_labels=3)
+    BertForSequenceClassification(config).save_pretrained(path)
+    try:
+        AutoTokenizer.from_pretrained("yiyanghkust/finbert-tone").save_pretrained(path)
+    except Exception:
+        AutoTokenizer.from_pretrained("bert-base-uncased").save_pretrained(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--synthetic", action="store_true", help="use a random BERT-base sized model")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**BENCH_ENV, "MODEL_CACHE_DIR": os.path.join(tmp, "models"), "LOG_LEVEL": "WARNING"}
+        if args.synthetic:
+            env["FINBERT_MODEL"] = synthetic_model(os.path.join(tmp, "finbert-synthetic"))
+
+        print(f"🧠 FinBERT memory per worker ({env.get('FINBERT_MODEL', 'yiyanghkust/finbert-tone')})")
+        print(f"  {'mode':<8} {'workers':>7} {'USS/worker':>11} {'PSS/worker':>11} {'PSS total':>10}")
+        for mode in ("private", "mmap"):
+            mode_env = {**env, "MODEL_MMAP": "true" if mode == "mmap" else "false"}
+            if mode == "mmap":
+                measure(mode_env, 1)  # export once up front, as the first deploy would
+            for n in (int(w) for w in args.workers.split(",")):
+                uss, pss, total = measure(mode_env, n)
+                print(f"  {mode:<8} {n:>7} {uss:>9.0f}Mi {pss:>9.0f}Mi {total:>8.0f}Mi")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# bench/prices.py
+"""
+Upstream load and delivery of the live price stream as the client count grows.
+
+Usage (from backend/):
+    python -m bench.prices [--clients 10,100,500] [--tickers 20] [--seconds 5]
+Subscribes N in-process clients (each to 5 random tickers out of --tickers)
+to a PriceHub polling a fake Yahoo every --interval seconds. Prices move on
+every call. 10% of clients read only once a second, to exercise coalescing.
+Reports upstream calls against what per-client polling would have made.
+"""
+import argparse
+import asyncio
+import os
+import random
+
+from bench.fakes import FakeYahoo
+from bench.harness import BENCH_ENV
+
+WATCH_PER_CLIENT = 5
+
+
+def moving_download(fake: FakeYahoo):
+    """fake.download with the last close nudged on every call, so each poll is a change."""
+    rng = random.Random(0)
+
+    def download(tickers, **kwargs):
+        frame = fake.download(tickers, **kwargs)
+        frame.iloc[-1, frame.columns.get_level_values("Price") == "Close"] *= 1 + rng.uniform(-0.01, 0.01)
+        return frame
+
+    return download
+
+
+async def run(clients: int, tickers: int, seconds: float, interval: float):
+    import yfinance as yf
+    from app.services.priceStream import PriceHub, Subscriber
+    from app.utils.metrics import PRICE_STREAM_COALESCED
+
+    fake = FakeYahoo()
+    yf.download = moving_download(fake)
+    universe = [f"T{i:03d}" for i in range(tickers)]
+    hub = PriceHub(interval=interval)
+    received = 0
+    coalesced_before = PRICE_STREAM_COALESCED._value.get()
+
+    async def client(slow: bool):
+        nonlocal received
+        subscriber = Subscriber()
+        hub.subscribe(subscriber, random.sample(universe, WATCH_PER_CLIENT))
+        while True:
+            received += len(await subscriber.next_batch())
+            if slow:
+                await asyncio.sleep(1.0)
+
+    tasks = [asyncio.create_task(client(slow=i % 10 == 0)) for i in range(clients)]
+    await asyncio.sleep(seconds)
+    watched = hub.watched()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await hub.close()
+
+    naive = clients * WATCH_PER_CLIENT * int(seconds / interval + 1)
+    coalesced = PRICE_STREAM_COALESCED._value.get() - coalesced_before
+    print(f"  {clients:>7} {watched:>8} {fake.calls:>14} {naive:>16} {received:>9} {coalesced:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", default="10,100,500")
+    parser.add_argument("--tickers", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--interval", type=float, default=0.5, help="poll cadence, seconds")
+    args = parser.parse_args()
+
+    # No shared cache, so every poll reaches the fake upstream
+    os.environ.update({**BENCH_ENV, "CACHE_BACKEND": "none"})
+    random.seed(0)
+
+    print(f"📡 Price stream: {args.tickers} tickers, poll every {args.interval}s for {args.seconds}s")
+    print(f"  {'clients':>7} {'watched':>8} {'upstream calls':>14} {'per-client polls':>16} "
+          f"{'delivered':>9} {'coalesced':>10}")
+    for clients in (int(c) for c in args.clients.split(",")):
+        asyncio.run(run(clients, args.tickers, args.seconds, args.interval))
+
+
+if __name__ == "__main__":
+    main()
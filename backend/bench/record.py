@@ -0,0 +1,40 @@
+# bench/record.py
+"""
+Record daily OHLCV history from Yahoo Finance into bench/fixtures/<TICKER>.csv
+so the fake upstream replays real prices.
+
+Usage (from backend/, needs network):
+    python -m bench.record [TICKER ...]
+"""
+import os
+import sys
+import yfinance as yf
+
+from bench.fakes import AS_OF, FIXTURES_DIR
+from bench.harness import BENCH_ENV
+
+
+def record(ticker: str):
+    df = yf.Ticker(ticker).history(start="2015-01-01", end=AS_OF.isoformat(), auto_adjust=False)
+    if df.empty:
+        print(f"❌ No data for {ticker}")
+        return
+    df.index = df.index.tz_localize(None)
+    df.index.name = "Date"
+    df[["Open", "High", "Low", "Close", "Volume"]].to_csv(FIXTURES_DIR / f"{ticker}.csv")
+    print(f"✅ {ticker}: {len(df)} rows")
+
+
+def main():
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+    from app.scripts.insert_companies import companies
+
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    tickers = sys.argv[1:] or [c["ticker"] for c in companies]
+    for ticker in tickers:
+        record(ticker)
+
+
+if __name__ == "__main__":
+    main()
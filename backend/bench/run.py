@@ -0,0 +1,249 @@
+# bench/run.py
+"""
+Offline benchmark suite.
+
+Usage (from backend/):
+    python -m bench.run --out bench-report.json
+    python -m bench.run --only micro --repeat 10
+    python -m bench.run --only load --clients 50 --requests 400
+    python -m bench.run --cache-backend sqlite
+    python -m bench.compare old.json new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from bench.harness import Report, asgi_stream, install, time_async, time_sync
+
+TICKER = "AAPL"
+
+
+# ---------------------------
+# Micro-benchmarks (one stage each)
+# ---------------------------
+async def run_micro(env, report: Report, repeat: int):
+    from app.services import yfinance_helper
+    from app.services.loginHelper import create_access_token
+    from app.services.portfolioRevaluation import revalue_all
+    from app.services.userDetails import get_current_user
+    from app.services.analyzeStock import analyze_company
+    from app.services import backtest
+    from app.utils.lexiconSentiment import lexicon_scores
+    from app.utils.stockPredict import predict_stock
+    from app.utils.tweetsPredict import finbert_sentiment, predict_tweet
+    from bench.fakes import load_tweet_fixtures
+
+    print("⏱  Micro-benchmarks")
+    tweets = [t["tweet_text"] for doc in load_tweet_fixtures() for t in doc["tweets"]]
+
+    report.add("price.current", time_sync(lambda: yfinance_helper.get_stock_price(TICKER), repeat))
+    report.add("price.on_date", time_sync(lambda: yfinance_helper.get_stock_price_on_date(TICKER, "2024-03-15"), repeat))
+    report.add("price.history_1y", time_sync(lambda: yfinance_helper.get_stock_history(TICKER, "1y"), repeat))
+
+    report.add("sentiment.lexicon_batch", time_sync(lambda: lexicon_scores(tweets), repeat), tweets=len(tweets))
+    report.add("sentiment.finbert_single", time_sync(lambda: finbert_sentiment(tweets[0]), repeat))
+
+    report.add("stage.predict_stock", await time_async(lambda: predict_stock(TICKER, future_days=90), max(1, repeat // 2)))
+    report.add("stage.predict_tweet", await time_async(lambda: predict_tweet(TICKER), max(1, repeat // 2)))
+
+    user = await env.db.users.find_one({})
+    token = create_access_token({"sub": str(user["_id"]), "email": user["email"]})
+    report.add("stage.get_current_user", await time_async(lambda: get_current_user(token), repeat),
+               holdings=len(user["portfolio"]))
+
+    users = await env.db.users.count_documents({})
+    report.add("job.revalue_all", await time_async(revalue_all, max(1, repeat // 2)), users=users)
+
+    report.add("stage.analyze_company", await time_async(lambda: analyze_company(TICKER), max(1, repeat // 2)))
+
+    # Full weight / threshold grid over every company (analyze_company above stored a snapshot)
+    backtest.db = env.db  # imported after install() swapped the other modules' clients
+    tickers = [c["ticker"] async for c in env.db.companies.find({}, {"ticker": 1})]
+    closes = await backtest.load_closes(tickers)
+    sentiment, _ = await backtest.load_sentiment(closes.index, closes.columns)
+    report.add("backtest.grid", time_sync(lambda: backtest.run_grid(closes, sentiment), max(1, repeat // 2)),
+               tickers=closes.shape[1], sessions=closes.shape[0])
+
+
+# ---------------------------
+# End-to-end load tests
+# ---------------------------
+async def load_test(client, method, url, clients: int, requests: int, **kwargs):
+    """`clients` concurrent workers share `requests` calls; returns (latencies, errors, wall)."""
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                resp = await client.request(method, url, **kwargs)
+                if resp.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def login_burst(env, client, report: Report, clients: int, requests: int, logins: int = 200):
+    """p99 of unrelated endpoints while `logins` bcrypt logins are in flight."""
+    from app.services.loginHelper import pwd_context
+
+    password = "bench-password"
+    hashed = pwd_context.hash(password)
+    emails = [f"burst{i}@example.com" for i in range(logins)]
+    await env.db.users.insert_many([
+        {"username": e.split("@")[0], "email": e, "password": hashed, "portfolio": [], "profit": 0.0}
+        for e in emails
+    ])
+
+    async def burst():
+        sem = asyncio.Semaphore(clients)
+
+        async def one(email):
+            async with sem:
+                await client.post("/login", json={"email": email, "password": password})
+
+        await asyncio.gather(*(one(e) for e in emails))
+
+    for name, url in [("GET /", "/"), ("GET /companies", "/companies")]:
+        burst_task = asyncio.create_task(burst())
+        await asyncio.sleep(0)  # let the burst start first
+        latencies, errors, wall = await load_test(client, "GET", url, clients, requests)
+        report.add(f"load.login_burst.{name}", latencies, errors=errors, clients=clients,
+                   rps=len(latencies) / wall, logins=logins)
+        await burst_task
+
+
+def legacy_chat_bytes(user, history) -> int:
+    """Size of the request the old browser-side Chatbot sent to Gemini for `history`."""
+    holdings = "; ".join(
+        f"{h.get('companyName', h['companyId'])}: {h['quantity']} shares purchased at "
+        f"${h.get('purchasePrice') or 0:.2f} on {h['purchaseDate']} (current price: "
+        f"${h.get('currentPrice') or 0:.2f}, total profit: ${h.get('totalProfit') or 0:.2f})"
+        for h in user["portfolio"]
+    )
+    system = (f"You are FinTweet's AI financial assistant. The current user is {user['username']}. \n"
+              f"User's current stock holdings: {holdings}.\n"
+              "Provide personalized financial insights, portfolio advice, and market analysis based on their "
+              "queries and these holdings. \nKeep responses concise, helpful, and professional. If the query "
+              "relates to holdings, reference specific stocks where relevant.\nFormat your responses using "
+              "markdown for better readability (use **bold**, *italic*, bullet points, etc.).")
+    body = {
+        "systemInstruction": {"parts": [{"text": system}]},
+        "contents": [{"role": role, "parts": [{"text": text}]} for role, text in history],
+    }
+    return len(json.dumps(body))
+
+
+async def chat_session(env, report: Report, auth: dict, user, turns: int = 20):
+    """One long /chat conversation: time-to-first-token, full reply time and prompt size per message."""
+    from app.main import app
+
+    question = "How exposed am I to the tech sector, and should I rebalance before earnings season?"
+    ttft, total, sent, legacy, history = [], [], [], [], []
+    conversation_id = None
+    headers = {**auth, "Content-Type": "application/json"}
+    for _ in range(turns):
+        prompt_before = env.llm.prompt_chars
+        body = json.dumps({"message": question, "conversationId": conversation_id}).encode()
+        chunks = await asgi_stream(app, "POST", "/chat", headers, body)
+
+        first = None
+        for elapsed, chunk in chunks:
+            for event in chunk.decode().split("\n\n"):
+                if event.startswith("event: meta"):
+                    conversation_id = json.loads(event.split("data: ", 1)[1])["conversationId"]
+                elif event.startswith("data: ") and first is None:
+                    first = elapsed
+        ttft.append(first)
+        total.append(chunks[-1][0])
+        sent.append(env.llm.prompt_chars - prompt_before)
+        history += [("user", question), ("model", env.llm.reply)]
+        legacy.append(legacy_chat_bytes(user, history))
+
+    report.add("load.chat.first_token", ttft, turns=turns)
+    report.add("load.chat.reply", total, turns=turns,
+               prompt_chars_mean=sum(sent) / turns, prompt_chars_last=sent[-1],
+               legacy_request_bytes_mean=sum(legacy) / turns, legacy_request_bytes_last=legacy[-1])
+
+
+async def run_load(env, report: Report, clients: int, requests: int):
+    import httpx
+    from app.main import app
+    from app.services.loginHelper import create_access_token
+
+    print(f"🚦 Load tests ({clients} clients, {requests} requests per scenario)")
+    user = await env.db.users.find_one({})
+    token = create_access_token({"sub": str(user["_id"]), "email": user["email"]})
+    auth = {"Authorization": f"Bearer {token}"}
+
+    scenarios = [
+        ("GET /", "GET", "/", {}, requests),
+        ("GET /companies", "GET", "/companies", {}, requests),
+        (f"GET /stocks/history/{TICKER}", "GET", f"/stocks/history/{TICKER}?range=1m", {}, requests),
+        ("GET /market/snapshot", "GET", "/market/snapshot", {}, requests),
+        ("GET /auth/me", "GET", "/auth/me", {"headers": auth}, requests),
+        (f"GET /analyze/{TICKER}", "GET", f"/analyze/{TICKER}", {}, max(clients, requests // 20)),
+    ]
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name, method, url, kwargs, n in scenarios:
+                latencies, errors, wall = await load_test(client, method, url, clients, n, **kwargs)
+                report.add(f"load.{name}", latencies, errors=errors, clients=clients, rps=len(latencies) / wall)
+            await chat_session(env, report, auth, await env.db.users.find_one({"_id": user["_id"]}))
+            await login_burst(env, client, report, clients, requests)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default="bench-report.json")
+    parser.add_argument("--only", choices=["micro", "load"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--yahoo-latency", type=float, default=0.0, help="seconds added to each fake Yahoo call")
+    parser.add_argument("--yahoo-error-rate", type=float, default=0.0, help="fraction of fake Yahoo calls that fail")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds added to each fake LLM call")
+    parser.add_argument("--cache-backend", choices=["none", "memory", "sqlite"], default="none",
+                        help="shared cache tier (sqlite uses a temporary file)")
+    args = parser.parse_args()
+
+    os.environ["CACHE_BACKEND"] = args.cache_backend
+    if args.cache_backend == "sqlite":
+        os.environ["CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+
+    env = await install(yahoo_latency=args.yahoo_latency, yahoo_error_rate=args.yahoo_error_rate,
+                        llm_latency=args.llm_latency)
+    report = Report()
+    report.meta.update({
+        "yahoo_latency": args.yahoo_latency,
+        "yahoo_error_rate": args.yahoo_error_rate,
+        "llm_latency": args.llm_latency,
+        "cache_backend": args.cache_backend,
+    })
+
+    if args.only in (None, "micro"):
+        await run_micro(env, report, args.repeat)
+    if args.only in (None, "load"):
+        await run_load(env, report, args.clients, args.requests)
+
+    report.meta["upstream_calls"] = {"yahoo": env.yahoo.calls, "llm": env.llm.calls}
+    report.write(args.out)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
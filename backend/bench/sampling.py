@@ -0,0 +1,77 @@
+# bench/sampling.py
+"""
+Tweets scored by adaptive sampling, and whether its confidence intervals hold.
+
+Usage (from backend/):
+    python -m bench.sampling [--copies 200] [--trials 200] [--epsilon 0.02] [--confidence 0.95]
+Builds bench.dedup's streams (thousands of tweets per influencer at the
+default --copies), scores every tweet once with VADER + TextBlob, then
+replays the sampling loop of tweet_sentiment on those scores --trials
+times with equal authority. Reports tweets scored, the error against the
+full mean and how often the full mean fell inside the reported interval
+(it should be about --confidence). No FinBERT, MongoDB or time budget.
+"""
+import argparse
+import os
+
+import numpy as np
+
+from bench.dedup import build_streams
+from bench.harness import BENCH_ENV
+
+BATCH = 32
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--copies", type=float, default=200.0, help="mean copies per original tweet")
+    parser.add_argument("--trials", type=int, default=200)
+    parser.add_argument("--epsilon", type=float, default=0.02)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    args = parser.parse_args()
+
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+    from app.utils.adaptiveSampling import SampledMean, weighted_interval, z_value
+    from app.utils.lexiconSentiment import lexicon_scores
+
+    streams = build_streams(args.copies)
+    scores = []
+    for tweets in streams.values():
+        v, t = lexicon_scores(tweets)
+        scores.append(0.6 * v + 0.4 * t)
+    weights = np.ones(len(scores))
+    exact = float(np.mean([s.mean() for s in scores]))
+    total = sum(len(s) for s in scores)
+    z = z_value(args.confidence)
+    print(f"🎲 Adaptive sampling (VADER + TextBlob, ±{args.epsilon} at {args.confidence:.0%}, batch {BATCH})")
+    print(f"  {len(scores)} influencers, {total} tweets, full score {exact:.4f}")
+
+    rng = np.random.default_rng(0)
+    scored, errors, covered = [], [], 0
+    for _ in range(args.trials):
+        samples = [SampledMean(len(s), rng) for s in scores]
+
+        def draw(i):
+            samples[i].add(scores[i][samples[i].next_indices(BATCH)])
+
+        for i in range(len(samples)):
+            draw(i)
+        while True:
+            mean, half_width = weighted_interval(samples, weights, z)
+            contributions = [s.variance() for s in samples]
+            if half_width <= args.epsilon or not max(contributions):
+                break
+            draw(int(np.argmax(contributions)))
+        scored.append(sum(s.n for s in samples))
+        errors.append(abs(mean - exact))
+        covered += abs(mean - exact) <= half_width
+
+    print(f"  tweets scored: mean {np.mean(scored):.0f}/{total} ({np.mean(scored) / total:.1%}), "
+          f"max {max(scored)}")
+    print(f"  |error|: mean {np.mean(errors):.4f}, max {max(errors):.4f}; "
+          f"full score inside the interval in {covered / args.trials:.1%} of {args.trials} trials")
+
+
+if __name__ == "__main__":
+    main()
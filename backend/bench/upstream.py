@@ -0,0 +1,88 @@
+# bench/upstream.py
+"""
+Exercise YahooClient against a fake upstream that injects latency and errors.
+
+Usage (from backend/):
+    python -m bench.upstream [--latency 0.05] [--error-rate 0.3] [--outage 2.0]
+Phases: warm-up (fills the fallback cache), degraded (random errors),
+outage (every call fails; breaker should open and stale data be served),
+recovery (breaker half-opens and closes again), steady (all fresh).
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fakes import FakeYahoo
+from bench.harness import BENCH_ENV
+
+TICKERS = ["AAPL", "MSFT", "TSLA", "NVDA", "AMZN"]
+
+
+def run_phase(client, name: str, calls: int, workers: int):
+    from app.services.yahoo_client import UpstreamUnavailable
+
+    fresh = stale = failed = 0
+    start = time.perf_counter()
+
+    def one(i):
+        try:
+            return client.history(TICKERS[i % len(TICKERS)], period="1d").stale
+        except UpstreamUnavailable:
+            return None
+
+    with ThreadPoolExecutor(workers) as pool:
+        for outcome in pool.map(one, range(calls)):
+            if outcome is None:
+                failed += 1
+            elif outcome:
+                stale += 1
+            else:
+                fresh += 1
+
+    wall = time.perf_counter() - start
+    print(f"  {name:<10} fresh={fresh:<5} stale={stale:<5} failed={failed:<5} "
+          f"breaker={client.breaker.state:<9} wall={wall:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.3)
+    parser.add_argument("--outage", type=float, default=2.0, help="breaker reset timeout, seconds")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+    from app.services.yahoo_client import YahooClient
+
+    fake = FakeYahoo(latency=args.latency)
+    client = YahooClient(
+        fetch_history=fake.history,
+        fetch_download=fake.download,
+        rate=50, burst=20, max_concurrency=4,
+        retries=2, backoff=0.05,
+        failure_threshold=5, reset_timeout=args.outage,
+    )
+
+    print(f"🔌 Fake Yahoo: latency={args.latency}s")
+    run_phase(client, "warm-up", len(TICKERS), args.workers)
+
+    fake.error_rate = args.error_rate
+    run_phase(client, "degraded", args.calls, args.workers)
+
+    fake.error_rate = 1.0
+    run_phase(client, "outage", args.calls, args.workers)
+
+    fake.error_rate = 0.0
+    time.sleep(args.outage)
+    run_phase(client, "recovery", args.calls, args.workers)
+    run_phase(client, "steady", args.calls, args.workers)
+
+    print(f"  upstream calls: {fake.calls}")
+
+
+if __name__ == "__main__":
+    main()
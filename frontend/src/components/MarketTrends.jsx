@@ -16,6 +16,13 @@ import {
 
 ChartJS.register(CategoryScale, LinearScale, PointElement, LineElement, Title, Tooltip, Legend);
 
+// "± 0.0150 (95%), 240/5600 tweets" for a sampled tweet score
+const sampledLabel = (c) => {
+  const tweets = `${c.tweets_scored}/${c.tweets_total} tweets`;
+  if (c.half_width == null) return tweets;
+  return `± ${c.half_width.toFixed(4)} (${Math.round(c.level * 100)}%), ${tweets}`;
+};
+
 export default function MarketTrends() {
   const [companies, setCompanies] = useState([]);
   const [selectedCompany, setSelectedCompany] = useState("");
@@ -202,7 +209,7 @@ export default function MarketTrends() {
                 <div className="flex items-center justify-between mb-3">
                   <span className="text-4xl">🔮</span>
                   <div className="bg-white/20 backdrop-blur-sm px-3 py-1 rounded-full text-xs font-semibold">
-                    90 DAYS
+                    {analysis.future_days} DAYS
                   </div>
                 </div>
                 <div className="text-purple-100 text-sm font-medium mb-1">Predicted Price</div>
@@ -286,7 +293,11 @@ export default function MarketTrends() {
                   <div className="text-gray-600 font-semibold">Tweet Score</div>
                 </div>
                 <div className="text-4xl font-bold text-gray-800">{analysis.tweet_score.toFixed(4)}</div>
-                <div className="text-xs text-gray-500 mt-2">Social Sentiment</div>
+                <div className="text-xs text-gray-500 mt-2">
+                  {analysis.tweet_confidence?.approximate
+                    ? sampledLabel(analysis.tweet_confidence)
+                    : "Social Sentiment"}
+                </div>
               </div>
 
               <div className="bg-white rounded-2xl shadow-xl p-6 border-l-4 border-amber-500 transform transition-all duration-300 hover:scale-105 hover:shadow-2xl hover:-translate-y-1">
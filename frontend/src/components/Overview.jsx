@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from "react";
 import axios from "../axios";
+import { subscribePrices } from "../priceStream";
 
 export default function Overview({ user }) {
   const [companies, setCompanies] = useState([]);
@@ -8,58 +9,14 @@ export default function Overview({ user }) {
   useEffect(() => {
     const fetchCompanies = async () => {
       try {
-        // 🔹 1️⃣ Try loading from localStorage first
-        const cachedData = localStorage.getItem("companiesData");
-        const cachedTimestamp = localStorage.getItem("companiesDataTimestamp");
-        const oneDay = 24 * 60 * 60 * 1000;
-
-        if (cachedData && cachedTimestamp) {
-          const parsedCache = JSON.parse(cachedData);
-          const isFresh = Date.now() - cachedTimestamp < oneDay;
-
-          // ⚠️ Use cache only if it’s fresh AND not empty
-          if (isFresh && Array.isArray(parsedCache) && parsedCache.length > 0) {
-            console.log("📦 Using cached company data");
-            setCompanies(parsedCache);
-            setLoading(false);
-            return;
-          } else {
-            console.warn("⚠️ Cache expired or empty, refetching data...");
-            // Clear invalid cache
-            localStorage.removeItem("companiesData");
-            localStorage.removeItem("companiesDataTimestamp");
-          }
-        }
-
-
-        // 🔹 2️⃣ Fetch all companies
-        const res = await axios.get("/companies");
-        const companyList = res.data;
-
-        // 🔹 3️⃣ Fetch stock data in parallel
-        const promises = companyList.map((c) =>
-          axios
-            .get(`/stocks/history/${c.ticker}`)
-            .then((stockRes) => ({
-              name: c.name,
-              ticker: c.ticker,
-              currentPrice: stockRes.data.currentPrice,
-              dailyChange: stockRes.data.dailyChange,
-            }))
-            .catch(() => null)
-        );
-
-        // 🔹 4️⃣ Wait for all promises to settle
-        const results = await Promise.allSettled(promises);
-
-        // 🔹 5️⃣ Filter out failed requests
-        const companiesWithData = results
-          .filter((r) => r.status === "fulfilled" && r.value)
-          .map((r) => r.value);
-
-        // 🔹 6️⃣ Cache results in localStorage
-        localStorage.setItem("companiesData", JSON.stringify(companiesWithData));
-        localStorage.setItem("companiesDataTimestamp", Date.now().toString());
+        // 🔹 One request for every company's price + daily change (cached server-side)
+        const res = await axios.get("/market/snapshot");
+        const companiesWithData = res.data.quotes.map((q) => ({
+          name: q.name,
+          ticker: q.ticker,
+          currentPrice: q.currentPrice,
+          dailyChange: q.dailyChange,
+        }));
 
         setCompanies(companiesWithData);
       } catch (err) {
@@ -72,6 +29,21 @@ export default function Overview({ user }) {
     fetchCompanies();
   }, []);
 
+  // 🔹 Live prices for every listed company, pushed over one shared WebSocket
+  const tickerKey = companies.map((c) => c.ticker).join(",");
+  useEffect(() => {
+    if (!tickerKey) return;
+    return subscribePrices(tickerKey.split(","), (quote) => {
+      setCompanies((prev) =>
+        prev.map((c) =>
+          c.ticker === quote.ticker
+            ? { ...c, currentPrice: quote.currentPrice, dailyChange: quote.dailyChange }
+            : c
+        )
+      );
+    });
+  }, [tickerKey]);
+
   if (loading) {
     return (
       <div className="min-h-screen bg-gray-50 p-6">
@@ -87,11 +59,14 @@ export default function Overview({ user }) {
     );
   }
 
-  // 🧮 Compute market stats
+  // 🧮 Compute market stats (dailyChange is null when there's no previous close yet)
+  const changed = companies.filter((c) => c.dailyChange != null);
   const marketStats = {
-    gainers: companies.filter((c) => c.dailyChange > 0).length,
-    losers: companies.filter((c) => c.dailyChange < 0).length,
-    avgChange: companies.reduce((sum, c) => sum + c.dailyChange, 0) / companies.length,
+    gainers: changed.filter((c) => c.dailyChange > 0).length,
+    losers: changed.filter((c) => c.dailyChange < 0).length,
+    avgChange: changed.length
+      ? changed.reduce((sum, c) => sum + c.dailyChange, 0) / changed.length
+      : 0,
   };
 
   return (
@@ -183,7 +158,9 @@ export default function Overview({ user }) {
                           c.dailyChange >= 0 ? "text-green-600" : "text-red-600"
                         }`}
                       >
-                        {c.dailyChange >= 0 ? "+" : ""}${Math.abs(c.dailyChange).toFixed(2)}
+                        {c.dailyChange == null
+                          ? "—"
+                          : `${c.dailyChange >= 0 ? "+" : ""}$${Math.abs(c.dailyChange).toFixed(2)}`}
                       </p>
                     </div>
                   </div>
@@ -1,6 +1,7 @@
 // src/components/StockChart.jsx
 import React, { useEffect, useState } from "react";
 import axios from "../axios";
+import { subscribePrices } from "../priceStream";
 import {
   LineChart,
   Line,
@@ -41,6 +42,19 @@ export default function StockChart({ company, portfolioItem }) {
     fetchData();
   }, [company, timeRange, portfolioItem]);
 
+  // Keep the price stats live between history fetches
+  useEffect(() => {
+    if (!company) return;
+    return subscribePrices([company], (quote) => {
+      const profitPerShare = quote.currentPrice - portfolioItem.purchasePrice;
+      setStats({
+        currentPrice: quote.currentPrice,
+        profitPerShare,
+        totalProfit: profitPerShare * portfolioItem.quantity,
+      });
+    });
+  }, [company, portfolioItem]);
+
   return (
     <div className="mb-6">
       {/* Time range buttons */}
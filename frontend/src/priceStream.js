@@ -0,0 +1,84 @@
+import axios from "./axios";
+
+// One WebSocket per tab, shared by every component that watches prices
+const WS_URL = axios.defaults.baseURL.replace(/^http/, "ws") + "/ws/prices";
+const RETRY_MS = 5000;
+const AUTH_CLOSE_CODE = 4401; // token rejected or expired: retrying with it won't help
+
+let socket = null;
+let retryTimer = null;
+const listeners = new Map(); // ticker -> Set of callbacks
+
+function send(action, tickers) {
+  if (socket?.readyState === WebSocket.OPEN && tickers.length > 0) {
+    socket.send(JSON.stringify({ action, tickers }));
+  }
+}
+
+function connect() {
+  const token = localStorage.getItem("token");
+  if (!token || socket) return;
+
+  socket = new WebSocket(`${WS_URL}?token=${encodeURIComponent(token)}`);
+  socket.onopen = () => send("subscribe", [...listeners.keys()]);
+  socket.onmessage = (event) => {
+    const message = JSON.parse(event.data);
+    if (message.type === "quotes") {
+      message.quotes.forEach((quote) => {
+        listeners.get(quote.ticker)?.forEach((callback) => callback(quote));
+      });
+    } else if (message.type === "error") {
+      console.warn("Price stream:", message.detail);
+    }
+  };
+  socket.onclose = (event) => {
+    socket = null;
+    if (event.code === AUTH_CLOSE_CODE) {
+      // Wait for a fresh login; the next subscribePrices() call reconnects
+      console.warn("Price stream closed:", event.reason || "not authorized");
+      return;
+    }
+    // Reconnect while anyone is still watching
+    if (listeners.size > 0 && !retryTimer) {
+      retryTimer = setTimeout(() => {
+        retryTimer = null;
+        if (listeners.size > 0) connect();
+      }, RETRY_MS);
+    }
+  };
+}
+
+// Call onQuote(quote) whenever a watched ticker's price changes; returns an unsubscribe function
+export function subscribePrices(tickers, onQuote) {
+  const added = [];
+  tickers.forEach((ticker) => {
+    if (!listeners.has(ticker)) {
+      listeners.set(ticker, new Set());
+      added.push(ticker);
+    }
+    listeners.get(ticker).add(onQuote);
+  });
+  if (socket) send("subscribe", added);
+  else connect();
+
+  return () => {
+    const removed = [];
+    tickers.forEach((ticker) => {
+      const callbacks = listeners.get(ticker);
+      if (!callbacks) return;
+      callbacks.delete(onQuote);
+      if (callbacks.size === 0) {
+        listeners.delete(ticker);
+        removed.push(ticker);
+      }
+    });
+    if (listeners.size === 0 && socket) {
+      const closing = socket;
+      socket = null;
+      closing.onclose = null;
+      closing.close();
+    } else {
+      send("unsubscribe", removed);
+    }
+  };
+}